@@ -61,7 +61,22 @@ a = Analysis(
         ('README.md', '.'),
         ('src/gesture_controller.py', 'src'),
         ('src/input_listener.py', 'src'),
+        ('src/hook_process.py', 'src'),
         ('src/actions.py', 'src'),
+        ('src/ewmh.py', 'src'),
+        ('src/event_log.py', 'src'),
+        ('src/gesture_stats.py', 'src'),
+        ('src/gesture_templates.py', 'src'),
+        ('src/dtw_matcher.py', 'src'),
+        ('src/control.py', 'src'),
+        ('src/ui_bus.py', 'src'),
+        ('src/gesture_feed.py', 'src'),
+        ('src/metrics_shm.py', 'src'),
+        ('src/launcher.py', 'src'),
+        ('src/click_deferral.py', 'src'),
+        ('src/scroll_stepper.py', 'src'),
+        ('src/listener_supervisor.py', 'src'),
+        ('src/power_saver.py', 'src'),
     ],
     hiddenimports=[
         'pystray',
@@ -72,7 +87,23 @@ a = Analysis(
         'psutil',
         'gesture_controller',
         'input_listener',
-        'actions'
+        'hook_process',
+        'actions',
+        'ewmh',
+        'event_log',
+        'gesture_stats',
+        'gesture_templates',
+        'dtw_matcher',
+        'control',
+        'ui_bus',
+        'gesture_feed',
+        'metrics_shm',
+        'launcher',
+        'click_deferral',
+        'scroll_stepper',
+        'listener_supervisor',
+        'power_saver',
+        'numpy'
     ],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Mouse Gesture Control - Command Line Client
+===========================================
+Sends a command to the running application over its local control channel.
+Only imports the standard library, so it returns long before a GUI could start.
+
+Usage: python gesturectl.py {enable|disable|reload|stats|show}
+"""
+
+import json
+import os
+import sys
+import time
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from control import COMMANDS, send_command
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: {os.path.basename(sys.argv[0])} {{{'|'.join(COMMANDS)}}}")
+        return 2
+
+    started = time.perf_counter()
+    try:
+        reply = send_command(sys.argv[1])
+    except (OSError, ValueError):
+        print("Mouse Gesture Control is not running.")
+        return 1
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if not reply.pop("ok", False):
+        print(f"Error: {reply.get('error', 'unknown error')}")
+        return 1
+    if reply:
+        print(json.dumps(reply, indent=4))
+    print(f"{sys.argv[1]}: ok ({elapsed_ms:.2f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,6 +12,13 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 if __name__ == "__main__":
+    # Single instance: hand over to the running app before loading any GUI modules
+    from control import is_running, send_command
+    if is_running():
+        send_command("show")
+        print("Mouse Gesture Control is already running.")
+        sys.exit(0)
+    
     try:
         from src.main_gui import MouseGestureControlApp
         app = MouseGestureControlApp()
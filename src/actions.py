@@ -3,20 +3,47 @@
 Actions
 -------
 Defines system actions triggered by gestures.
+
+Actions are performed with synthetic keystrokes by default. On Linux, desktop
+actions can go straight to the window manager instead (see ``ewmh.py``).
 """
 
+import sys
+
 from pynput import keyboard
-import time
 
 kb = keyboard.Controller()
 
-def show_debug_message(direction, action):
-    print(f"[Gesture] Swipe {direction.upper()} → {action.replace('_', ' ').title()}")
-    time.sleep(0.05)
+ACTIONS = ("task_view", "close_task_view", "desktop_left", "desktop_right")
+
+# Window manager backend (ewmh.EWMHDesktop), or None for keystrokes
+_backend = None
+
+
+def set_backend(name="auto"):
+    """Choose how actions are performed: "keys", "ewmh" or "auto" (EWMH on Linux if supported)."""
+    global _backend
+    if _backend:
+        _backend.close()
+        _backend = None
+    if name == "keys" or (name == "auto" and not sys.platform.startswith("linux")):
+        return None
+    try:
+        from ewmh import EWMHDesktop
+        _backend = EWMHDesktop()
+    except Exception as e:
+        if name == "ewmh":
+            print(f"EWMH backend unavailable, using keystrokes: {e}")
+    return _backend
+
 
-def perform_action(action, debug=False, direction=None, use_alt=False):
-    if debug and direction:
-        show_debug_message(direction, action)
+def perform_action(action, use_alt=False):
+    if _backend:
+        try:
+            if _backend.perform(action):
+                return
+        except Exception as e:
+            print(f"EWMH action failed, using keystrokes: {e}")
 
     # Choose modifier key based on config
     modifier_key = keyboard.Key.alt if use_alt else keyboard.Key.ctrl
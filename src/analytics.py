@@ -0,0 +1,251 @@
+"""
+Analytics
+---------
+Heatmaps and path statistics from recorded traces.
+
+Trace files are memory-mapped and split into chords without a Python-level
+loop over events: button state comes from running maxima of event indices,
+and per-chord sums come from ``numpy.bincount``. The report covers where
+chords start, the direction vectors of strokes, stroke length relative to
+``threshold`` (near misses show up just below 1.0) and the speed and
+straightness of strokes per direction. It is written as ``analytics.json``
+plus PNG heatmaps and histograms rendered with Pillow.
+
+Usage::
+
+    python src/analytics.py corpus/ --threshold 120 --out analytics/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from traces import BUTTONS, HEADER_SIZE, MAGIC, MOVE, PRESS, TRACE_DTYPE, trace_files
+
+DTYPE = np.dtype(TRACE_DTYPE)
+DIRECTIONS = ("up", "down", "left", "right")
+GRID = (96, 54)              # Start point heatmap bins (x, y)
+VECTOR_BINS = 81             # Direction vector heatmap bins per axis
+VECTOR_RANGE = 3.0           # ... covering +-3 thresholds
+LENGTH_BINS = np.linspace(0.0, 3.0, 61)   # Stroke length / threshold
+SPEED_BINS = np.linspace(0.0, 5000.0, 51)  # px/s
+SCALE = 6                    # Heatmap pixels per bin
+
+
+def load_trace(path):
+    """Memory-map the events of a trace file."""
+    with open(path, "rb") as f:
+        if f.read(HEADER_SIZE) != MAGIC:
+            raise ValueError(f"{path} is not a gesture trace file")
+    count = (os.path.getsize(path) - HEADER_SIZE) // DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=DTYPE)
+    return np.memmap(path, dtype=DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def button_down(kind, button, target):
+    """Whether ``target`` is held after each of the given button events."""
+    index = np.arange(len(kind))
+    last = np.maximum.accumulate(np.where(button == target, index, -1))
+    return (last >= 0) & (kind[np.maximum(last, 0)] == PRESS)
+
+
+def chord_strokes(events, chord=("left", "right")):
+    """Per-chord start point, end vector, peak distance, path length and duration.
+
+    Chords are delimited the way ``traces.iter_chords`` does it: a chord starts
+    when the last of its buttons goes down and ends when any of them is released.
+    """
+    kind = np.asarray(events["kind"])
+    # Button state only changes on the few click events; moves are classified afterwards
+    is_move = kind == MOVE
+    clicks = np.flatnonzero(~is_move)
+    click_kind = kind[clicks]
+    click_button = np.asarray(events["button"])[clicks]
+    held = np.ones(len(clicks), dtype=bool)
+    for name in chord:
+        held &= button_down(click_kind, click_button, BUTTONS.index(name))
+    previous = np.concatenate(([False], held[:-1]))
+    # Edges alternate, so ends[i] closes starts[i]; a chord still held when the
+    # recording stopped has no end and is dropped
+    ends = clicks[~held & previous]
+    starts = clicks[held & ~previous][:len(ends)]
+    n = len(starts)
+
+    # Events strictly inside each chord as one flat index array, with their chord
+    counts = ends - starts - 1
+    offsets = np.cumsum(counts) - counts
+    ids = np.repeat(np.arange(n), counts)
+    index = np.arange(len(ids)) + np.repeat(starts + 1 - offsets, counts)
+    keep = kind[index] == MOVE   # Clicks of other buttons during a chord
+    index = index[keep]
+    ids = ids[keep]
+
+    x = events["x"]
+    y = events["y"]
+    mx = x[index]
+    my = y[index]
+    x0 = x[starts]
+    y0 = y[starts]
+    dx = mx - x0[ids]
+    dy = my - y0[ids]
+    # Moves are grouped by chord, so per-chord maxima are segment reductions
+    moved = np.bincount(ids, minlength=n)
+    first = np.cumsum(moved) - moved
+    peak = np.zeros(n)
+    if len(ids):
+        peak[moved > 0] = np.sqrt(np.maximum.reduceat(dx * dx + dy * dy, first[moved > 0]))
+    # Path length: segments between consecutive moves of the same chord
+    same = ids[1:] == ids[:-1]
+    steps = np.sqrt(np.square(np.diff(mx)) + np.square(np.diff(my)))
+    path = np.bincount(ids[1:], weights=np.where(same, steps, 0.0), minlength=n)
+    t = events["t"]
+    return {
+        "x": x0.astype(np.float64), "y": y0.astype(np.float64),
+        "dx": (x[ends] - x0).astype(np.float64), "dy": (y[ends] - y0).astype(np.float64),
+        "peak": peak, "path": path, "duration": t[ends] - t[starts],
+    }
+
+
+def classify(dx, dy):
+    """Dominant-axis direction index into DIRECTIONS, as GestureController decides it."""
+    horizontal = np.abs(dx) > np.abs(dy)
+    return np.where(horizontal, np.where(dx > 0, 3, 2), np.where(dy > 0, 1, 0))
+
+
+def analyze(paths, threshold=120.0, chord=("left", "right")):
+    """Aggregate strokes from all trace files into histograms."""
+    parts = []
+    events = 0
+    for path in paths:
+        trace = load_trace(path)
+        events += len(trace)
+        parts.append(chord_strokes(trace, chord))
+    strokes = {key: np.concatenate([part[key] for part in parts]) if parts else np.zeros(0)
+               for key in ("x", "y", "dx", "dy", "peak", "path", "duration")}
+    n = len(strokes["x"])
+
+    ratio = strokes["peak"] / threshold
+    length_hist, _ = np.histogram(ratio, bins=LENGTH_BINS)
+
+    bounds = [[0.0, max(float(strokes["x"].max()), 1.0)] if n else [0.0, 1.0],
+              [0.0, max(float(strokes["y"].max()), 1.0)] if n else [0.0, 1.0]]
+    starts, _, _ = np.histogram2d(strokes["x"], strokes["y"], bins=GRID, range=bounds)
+    span = VECTOR_RANGE * threshold
+    vectors, _, _ = np.histogram2d(strokes["dx"], strokes["dy"], bins=VECTOR_BINS,
+                                   range=[[-span, span], [-span, span]])
+
+    # Speeds only for strokes that reached the threshold, i.e. fired gestures
+    fired = ratio >= 1.0
+    direction = classify(strokes["dx"], strokes["dy"])
+    # Net speed (sensor jitter inflates the path length, not the peak distance)
+    speed = np.divide(strokes["peak"], strokes["duration"],
+                      out=np.zeros(n), where=strokes["duration"] > 0)
+    # 1.0 for a straight stroke, lower for curved or wobbly ones
+    straightness = np.divide(strokes["peak"], strokes["path"],
+                             out=np.ones(n), where=strokes["path"] > 0)
+    counts = np.bincount(direction[fired], minlength=len(DIRECTIONS))
+    speeds = {}
+    for i, name in enumerate(DIRECTIONS):
+        selected = fired & (direction == i)
+        values = speed[selected]
+        hist, _ = np.histogram(values, bins=SPEED_BINS)
+        speeds[name] = {
+            "count": int(counts[i]),
+            "p10": round(float(np.percentile(values, 10)), 1) if len(values) else None,
+            "p50": round(float(np.percentile(values, 50)), 1) if len(values) else None,
+            "p90": round(float(np.percentile(values, 90)), 1) if len(values) else None,
+            "straightness_p50": round(float(np.median(straightness[selected])), 3) if len(values) else None,
+            "histogram": hist.tolist(),
+        }
+
+    return {
+        "files": len(paths),
+        "events": events,
+        "strokes": n,
+        "threshold": threshold,
+        "fired": int(fired.sum()),
+        "near_misses": int(((ratio >= 0.8) & (ratio < 1.0)).sum()),
+        "length_ratio": {"bins": LENGTH_BINS.tolist(), "histogram": length_hist.tolist()},
+        "speed_bins": SPEED_BINS.tolist(),
+        "speed": speeds,
+        "start_heatmap": {"range": bounds, "histogram": starts.astype(int).T.tolist()},
+        "vector_heatmap": {"range": [[-span, span], [-span, span]],
+                           "histogram": vectors.astype(int).T.tolist()},
+    }
+
+
+def heatmap_image(histogram, scale=SCALE):
+    """Render a 2D count array (rows = y) as a log-scaled heat image."""
+    counts = np.log1p(np.asarray(histogram, dtype=np.float64))
+    level = counts / counts.max() if counts.max() > 0 else counts
+    # Black -> red -> yellow -> white
+    rgb = np.clip(np.stack((level * 3, level * 3 - 1, level * 3 - 2), axis=-1), 0.0, 1.0)
+    image = Image.fromarray((rgb * 255).astype(np.uint8), "RGB")
+    return image.resize((image.width * scale, image.height * scale), Image.NEAREST)
+
+
+def bar_chart(histogram, width=600, height=160, marker=None):
+    """Render a 1D histogram as bars; ``marker`` is a bin position to draw a line at."""
+    counts = np.asarray(histogram, dtype=np.float64)
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    if counts.max() > 0:
+        bar = width / len(counts)
+        for i, count in enumerate(counts):
+            top = height - count / counts.max() * (height - 10)
+            draw.rectangle([i * bar, top, (i + 1) * bar - 1, height], fill=(60, 90, 160))
+    if marker is not None:
+        draw.line([marker * width / len(counts), 0, marker * width / len(counts), height], fill="red")
+    return image
+
+
+def write_report(report, directory):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "analytics.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    heatmap_image(report["start_heatmap"]["histogram"]).save(os.path.join(directory, "starts.png"))
+    heatmap_image(report["vector_heatmap"]["histogram"]).save(os.path.join(directory, "vectors.png"))
+    # Red line at the threshold (ratio 1.0)
+    threshold_bin = 1.0 / (LENGTH_BINS[1] - LENGTH_BINS[0])
+    bar_chart(report["length_ratio"]["histogram"], marker=threshold_bin).save(
+        os.path.join(directory, "lengths.png"))
+    speeds = Image.new("RGB", (600, 170 * len(DIRECTIONS)), "white")
+    draw = ImageDraw.Draw(speeds)
+    for i, name in enumerate(DIRECTIONS):
+        speeds.paste(bar_chart(report["speed"][name]["histogram"]), (0, i * 170 + 10))
+        draw.text((5, i * 170), name, fill="black")
+    speeds.save(os.path.join(directory, "speeds.png"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Heatmaps and path analytics from gesture traces.")
+    parser.add_argument("path", help="trace file or corpus directory")
+    parser.add_argument("--threshold", type=float, default=120.0)
+    parser.add_argument("--chord", nargs="+", default=["left", "right"], choices=BUTTONS[1:])
+    parser.add_argument("--out", default="analytics", help="output directory for JSON and PNG files")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    report = analyze(trace_files(args.path), threshold=args.threshold, chord=tuple(args.chord))
+    write_report(report, args.out)
+    elapsed = time.perf_counter() - started
+
+    print(f"{report['events']:,} events, {report['strokes']:,} strokes from {report['files']} files "
+          f"in {elapsed:.2f}s")
+    print(f"Fired {report['fired']}, near misses (0.8-1.0x threshold) {report['near_misses']}")
+    for name, stats in report["speed"].items():
+        if stats["count"]:
+            print(f"  {name:5s} {stats['count']:6d} strokes, speed p50 {stats['p50']} px/s "
+                  f"(p10 {stats['p10']}, p90 {stats['p90']}), straightness {stats['straightness_p50']}")
+    print(f"Wrote {args.out}/analytics.json and PNG charts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
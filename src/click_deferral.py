@@ -0,0 +1,124 @@
+"""
+ClickDeferral
+-------------
+Holds back the first button of a possible chord and replays it if the chord
+does not complete.
+
+The input hook hands every chord-button event it swallowed to a
+ClickReplayer. A held press is either cancelled (the chord completed) or
+injected again once the hold window expires or its release arrives. Replayed
+events keep their original spacing, and the extra latency each replayed press
+picked up is tracked so it can be kept below perception thresholds.
+"""
+
+import threading
+import time
+from collections import deque
+
+DELAY_SAMPLES = 1000
+
+
+class ClickReplayer:
+    def __init__(self, inject, hold=0.04, clock=time.perf_counter):
+        # inject(button, pressed) sends a synthetic event to the system
+        self.inject = inject
+        self.hold = hold
+        self.clock = clock
+        self.held = None          # (button, press time) awaiting a decision
+        self.queue = deque()      # (button, pressed, original time) to replay in order
+        self.delays = deque(maxlen=DELAY_SAMPLES)
+        self.replayed = 0
+        self.swallowed = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ClickReplayer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def hold_press(self, button):
+        """Hold back a press until the chord completes or the window expires."""
+        with self._cond:
+            self._release_held()
+            self.held = (button, self.clock())
+            self._cond.notify()
+
+    def swallow_held(self):
+        """The chord completed: drop the held press for good.
+
+        Returns the dropped button, or None if it had already been replayed.
+        """
+        with self._cond:
+            if self.held is None:
+                return None
+            button = self.held[0]
+            self.held = None
+            self.swallowed += 1
+            return button
+
+    def replay(self, button, pressed):
+        """Pass an event through, after any held press it must follow."""
+        with self._cond:
+            self._release_held()
+            self.queue.append((button, pressed, self.clock()))
+            self._cond.notify()
+
+    def _release_held(self):
+        if self.held is not None:
+            button, t = self.held
+            self.held = None
+            self.queue.append((button, True, t))
+
+    def stats(self):
+        """Added latency of replayed presses, in milliseconds."""
+        delays = sorted(self.delays)
+        if not delays:
+            return {"replayed": self.replayed, "swallowed": self.swallowed}
+        return {
+            "replayed": self.replayed,
+            "swallowed": self.swallowed,
+            "mean_ms": sum(delays) / len(delays) * 1000,
+            "p99_ms": delays[min(len(delays) - 1, int(len(delays) * 0.99))] * 1000,
+            "max_ms": delays[-1] * 1000,
+        }
+
+    def _run(self):
+        last_original = last_injected = None
+        while True:
+            with self._cond:
+                while self._running and not self.queue:
+                    if self.held is not None:
+                        remaining = self.held[1] + self.hold - self.clock()
+                        if remaining <= 0:
+                            self._release_held()
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                if not self._running:
+                    return
+                button, pressed, original = self.queue.popleft()
+
+            # Preserve the spacing between consecutive replayed events
+            if last_original is not None:
+                wait = (original - last_original) - (self.clock() - last_injected)
+                if wait > 0:
+                    time.sleep(wait)
+            self.inject(button, pressed)
+            last_original, last_injected = original, self.clock()
+            if pressed:
+                self.replayed += 1
+                self.delays.append(last_injected - original)
@@ -0,0 +1,282 @@
+"""
+Control
+-------
+Single-instance guard and local command channel for the running app.
+
+The app binds a Unix domain socket only its user can open; a successful bind
+doubles as the single-instance lock. On systems without ``AF_UNIX`` (Windows)
+it locks a per-user lock file instead and listens on an ephemeral loopback TCP
+port. The port and a random token go into a per-user endpoint file, and every
+client has to send the token first, so other users and other local programs
+cannot reach the app.
+
+Clients send one command per connection as a line of text and get one line of
+JSON back. This module only uses the standard library so the CLI client can
+import it without pulling in any GUI modules. The gesture feed uses the same
+per-user endpoints (``local_address``, ``listen``, ``connect``).
+"""
+
+import getpass
+import hmac
+import json
+import os
+import secrets
+import socket
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+COMMANDS = ("enable", "disable", "reload", "stats", "show")
+TIMEOUT = 2.0
+TOKEN_BYTES = 16
+
+
+class AlreadyRunningError(Exception):
+    pass
+
+
+def user_path(name):
+    """Per-user runtime path ``mousegesturecontrol-<user>.<name>``."""
+    if hasattr(os, "getuid"):
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+        return os.path.join(runtime_dir, f"mousegesturecontrol-{os.getuid()}.{name}")
+    # LOCALAPPDATA (and the temp directory inside it) is private to the user on Windows
+    runtime_dir = os.environ.get("LOCALAPPDATA") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"mousegesturecontrol-{getpass.getuser()}.{name}")
+
+
+def local_address(name):
+    """Return ``(family, address)`` of the local channel ``name``.
+
+    The address is a Unix domain socket path, or without ``AF_UNIX`` the path
+    of the endpoint file holding the loopback port and token.
+    """
+    if hasattr(socket, "AF_UNIX"):
+        return socket.AF_UNIX, user_path(name)
+    return socket.AF_INET, user_path(f"{name}.endpoint")
+
+
+def socket_address():
+    """Return ``(family, address)`` of the control channel."""
+    return local_address("sock")
+
+
+def listen(family, address, backlog=8):
+    """Bind and listen on a local channel; return ``(sock, token)``.
+
+    A Unix domain socket is made private to the user and has no token. Over
+    TCP the socket gets an ephemeral loopback port, written with a new token
+    to the endpoint file at ``address``.
+    """
+    if family == socket.AF_UNIX:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.bind(address)
+            os.chmod(address, 0o600)
+            sock.listen(backlog)
+        except OSError:
+            sock.close()
+            raise
+        return sock, None
+
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(backlog)
+        token = secrets.token_hex(TOKEN_BYTES)
+        temp_path = f"{address}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"port": sock.getsockname()[1], "token": token}, f)
+        os.replace(temp_path, address)
+    except OSError:
+        sock.close()
+        raise
+    return sock, token
+
+
+def unlink(address):
+    """Remove a channel's socket or endpoint file, if it is still there."""
+    try:
+        os.unlink(address)
+    except FileNotFoundError:
+        pass
+
+
+def connect(family, address, timeout=None):
+    """Open a connection to a local channel, sending the endpoint token over TCP.
+
+    Raises ``FileNotFoundError`` or ``ConnectionError`` if nothing listens.
+    """
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        if family == socket.AF_UNIX:
+            sock.connect(address)
+        else:
+            with open(address, "r") as f:
+                endpoint = json.load(f)
+            sock.connect(("127.0.0.1", endpoint["port"]))
+            sock.sendall(endpoint["token"].encode() + b"\n")
+    except (KeyError, TypeError, ValueError) as e:
+        sock.close()
+        raise ConnectionError(f"Unreadable endpoint file {address}: {e}") from e
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def token_matches(line, token):
+    """Check the first line a TCP client sent against the endpoint token."""
+    return hmac.compare_digest(line.strip(), token.encode())
+
+
+def _lock_file(path):
+    """Take an exclusive lock on ``path`` without waiting; return the fd or None if held."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if msvcrt is not None:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        elif fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock_file(fd):
+    if msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)   # Also drops a flock
+
+
+def send_command(command, timeout=TIMEOUT):
+    """Send a command to the running instance and return its JSON reply.
+
+    Raises ``ConnectionError`` (or ``OSError``) if no instance is running.
+    """
+    with connect(*socket_address(), timeout=timeout) as sock:
+        sock.sendall(command.encode() + b"\n")
+        with sock.makefile("rb") as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError("No reply from the running instance")
+    return json.loads(line)
+
+
+def probe():
+    """Who holds the control channel: ``"running"``, ``"stale"`` (nobody) or ``"other"``."""
+    try:
+        reply = send_command("ping", timeout=0.5)
+    except (FileNotFoundError, ConnectionRefusedError):
+        return "stale"
+    except (OSError, ValueError):
+        return "other"
+    # Anything else listening there is not an instance of the app
+    return "running" if isinstance(reply, dict) and reply.get("ok") is True else "other"
+
+
+def is_running():
+    """Return True if another instance answers on the control channel."""
+    return probe() == "running"
+
+
+class ControlServer:
+    def __init__(self, handlers):
+        # handlers: command name -> callable returning a JSON-serializable dict
+        self.handlers = dict(handlers)
+        self.handlers.setdefault("ping", lambda: {})
+        self._sock = None
+        self._token = None
+        self._lock_fd = None
+        self._thread = None
+
+    def start(self):
+        """Bind the control channel.
+
+        Raises AlreadyRunningError if another instance of this user holds it,
+        and OSError if the channel is taken by something else.
+        """
+        family, address = socket_address()
+        if family == socket.AF_UNIX:
+            if os.path.exists(address):
+                holder = probe()
+                if holder == "running":
+                    raise AlreadyRunningError(address)
+                if holder == "other":
+                    raise OSError(f"{address} is held by a program that does not answer as Mouse Gesture Control")
+                os.unlink(address)  # Stale socket left by a crashed instance
+        else:
+            # The lock file is per user, so whoever holds it is another instance
+            self._lock_fd = _lock_file(f"{address}.lock")
+            if self._lock_fd is None:
+                raise AlreadyRunningError(address)
+
+        try:
+            sock, self._token = listen(family, address)
+        except OSError as e:
+            self._release()
+            if is_running():
+                raise AlreadyRunningError(address) from e
+            raise
+        self._sock = sock
+        self._thread = threading.Thread(target=self._serve, name="ControlServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._sock is None:
+            return
+        family, address = socket_address()
+        sock, self._sock = self._sock, None
+        try:
+            sock.shutdown(socket.SHUT_RDWR)  # Wakes the blocked accept()
+        except OSError:
+            pass
+        sock.close()
+        unlink(address)
+        self._release()
+
+    def _release(self):
+        if self._lock_fd is not None:
+            _unlock_file(self._lock_fd)
+            self._lock_fd = None
+
+    def _serve(self):
+        sock = self._sock
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            with conn:
+                try:
+                    conn.settimeout(TIMEOUT)
+                    with conn.makefile("rb") as request:
+                        if self._token and not token_matches(request.readline(), self._token):
+                            continue   # Not this user's client: no reply
+                        command = request.readline().decode().strip()
+                    conn.sendall(json.dumps(self._handle(command)).encode() + b"\n")
+                except OSError:
+                    pass
+
+    def _handle(self, command):
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"unknown command: {command}"}
+        try:
+            reply = {"ok": True}
+            reply.update(handler() or {})
+            return reply
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
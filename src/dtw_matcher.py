@@ -0,0 +1,226 @@
+"""
+DTWMatcher
+----------
+Dynamic time warping matcher for large custom gesture libraries.
+
+Strokes are compared with DTW restricted to a Sakoe-Chiba band, so a gesture
+drawn slower at the start and faster at the end still matches its template.
+Most templates never get a full DTW: the per-template band envelopes are
+precomputed into one index array, the LB_Keogh lower bound of a stroke against
+every template is a single vectorized pass, and candidates are visited in
+lower-bound order until the bound exceeds the best distance found so far. The
+DTW itself abandons a candidate as soon as its partial cost plus the remaining
+lower bound cannot beat the best.
+
+Usage::
+
+    python src/dtw_matcher.py --bench --templates 1000
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+from gesture_templates import POINTS, normalize, resample
+
+BAND = 0.1   # Sakoe-Chiba band half-width as a fraction of the stroke length
+
+
+def envelope(strokes, radius):
+    """Upper and lower band envelopes of ``(n, points, 2)`` strokes."""
+    padded = np.pad(strokes, ((0, 0), (radius, radius), (0, 0)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1, axis=1)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(strokes, upper, lower):
+    """Per-point LB_Keogh contributions of strokes against band envelopes.
+
+    Arrays are laid out as ``(2, ..., points)`` with x and y first, so both
+    coordinates are contiguous and the pass over the whole index stays a few
+    flat vector operations. Every stroke point has to be matched to some
+    point inside its band, and none of those lies closer than the band's
+    bounding box, so the sums over points are lower bounds of the banded DTW
+    distance.
+    """
+    excess = np.maximum(strokes - upper, lower - strokes)
+    np.maximum(excess, 0.0, out=excess)
+    excess *= excess
+    return np.sqrt(excess[0] + excess[1])
+
+
+def dtw(qx, qy, tx, ty, radius, best=math.inf, tail=None):
+    """Banded DTW distance between two strokes given as coordinate lists.
+
+    The cost is the sum of point distances along the warping path. With
+    ``tail[i]``, a lower bound of the cost of the rows after ``i``, the
+    candidate is abandoned (``inf``) as soon as it cannot beat ``best``.
+    """
+    n = len(qx)
+    inf = math.inf
+    hypot = math.hypot
+    previous = None
+    for i in range(n):
+        x = qx[i]
+        y = qy[i]
+        low = i - radius if i > radius else 0
+        high = i + radius + 1 if i + radius + 1 < n else n
+        current = [inf] * (n + 1)   # current[j + 1] is D[i, j]; current[0] stands for j = -1
+        if previous is None:
+            left = 0.0
+            for j in range(low, high):
+                left += hypot(x - tx[j], y - ty[j])
+                current[j + 1] = left
+            row_min = current[1]
+        else:
+            left = row_min = inf
+            for j in range(low, high):
+                a = previous[j + 1]
+                b = previous[j]
+                if b < a:
+                    a = b
+                if left < a:
+                    a = left
+                left = a + hypot(x - tx[j], y - ty[j])
+                current[j + 1] = left
+                if left < row_min:
+                    row_min = left
+        if tail is not None and row_min + tail[i] >= best:
+            return inf
+        previous = current
+    return previous[n]
+
+
+class DTWMatcher:
+    def __init__(self, templates, radii, band=BAND):
+        templates = np.asarray(templates, dtype=np.float64).reshape(-1, POINTS, 2)
+        self.templates = templates
+        self.radii = np.asarray(radii, dtype=np.float64)
+        self.radius = max(1, int(round(POINTS * band)))
+        # Envelope index: band envelopes of every template, coordinates first
+        upper, lower = envelope(templates, self.radius)
+        self.upper = np.ascontiguousarray(upper.transpose(2, 0, 1), dtype=np.float32)
+        self.lower = np.ascontiguousarray(lower.transpose(2, 0, 1), dtype=np.float32)
+        self.coords = np.ascontiguousarray(templates.transpose(2, 0, 1), dtype=np.float32)
+        self.points = [template.T.tolist() for template in templates]
+        self.dtw_runs = 0   # Candidates that reached the DTW, for the benchmark
+
+    def __len__(self):
+        return len(self.templates)
+
+    def nearest(self, stroke):
+        """Return ``(index, DTW distance)`` of the closest template to a normalized stroke."""
+        query = stroke.T.astype(np.float32)[:, None, :]
+        contributions = lb_keogh(query, self.upper, self.lower)
+        bounds = contributions.sum(axis=-1)
+        qx, qy = stroke.T.tolist()
+
+        # The template with the lowest bound gives the first upper bound
+        best_index = int(np.argmin(bounds))
+        best = dtw(qx, qy, *self.points[best_index], self.radius)
+        self.dtw_runs += 1
+
+        candidates = np.flatnonzero(bounds < best)
+        if len(candidates) > 1:
+            # Tighten with the reverse bound: template points against the stroke's envelope
+            upper, lower = envelope(stroke[None].astype(np.float32), self.radius)
+            reverse = lb_keogh(self.coords[:, candidates], upper.transpose(2, 0, 1),
+                               lower.transpose(2, 0, 1)).sum(axis=-1)
+            bounds = np.maximum(bounds[candidates], reverse)
+            order = np.argsort(bounds, kind="stable")
+            candidates, bounds = candidates[order], bounds[order]
+            # Bound of the rows after each row, for early abandoning
+            tails = np.cumsum(contributions[candidates, ::-1], axis=-1)[:, -2::-1]
+
+            for k, i in enumerate(candidates.tolist()):
+                if bounds[k] >= best:
+                    break
+                if i == best_index:
+                    continue
+                self.dtw_runs += 1
+                d = dtw(qx, qy, *self.points[i], self.radius, best, tails[k].tolist() + [0.0])
+                if d < best:
+                    best, best_index = d, i
+        return best_index, best
+
+    def match(self, points):
+        """Return the index of the closest template within its radius, or None."""
+        if not len(self.templates) or len(points) < 2:
+            return None
+        index, cost = self.nearest(normalize(resample(points)))
+        return index if cost / POINTS <= self.radii[index] else None
+
+
+def random_strokes(count, rng, points=POINTS):
+    """Smooth random strokes, normalized like trained templates."""
+    steps = rng.normal(0.0, 1.0, (count, points, 2))
+    steps = np.cumsum(np.cumsum(steps, axis=1), axis=1)  # Integrate twice for smooth curves
+    return normalize(steps)
+
+
+def warp(strokes, rng, noise=0.05, stretch=0.2):
+    """Time-warped, noisy copies of strokes as they would arrive from the hook."""
+    n, points, _ = strokes.shape
+    base = np.linspace(0.0, 1.0, points)
+    out = np.empty_like(strokes)
+    for k in range(n):
+        # Monotonic reparametrization: slow start, fast end or the other way round
+        power = np.exp(rng.uniform(-stretch, stretch))
+        t = base ** power * (points - 1)
+        for axis in range(2):
+            out[k, :, axis] = np.interp(t, np.arange(points), strokes[k, :, axis])
+    return out + rng.normal(0.0, noise, out.shape)
+
+
+def bench(templates=1000, queries=1000, band=BAND, seed=0):
+    rng = np.random.default_rng(seed)
+    library = random_strokes(templates, rng)
+    matcher = DTWMatcher(library, np.full(templates, 0.5), band)
+    targets = rng.integers(0, templates, queries)
+    strokes = normalize(warp(library[targets], rng))
+
+    matcher.nearest(strokes[0])  # Warm up
+    matcher.dtw_runs = 0
+    correct = 0
+    timings = []
+    for stroke, target in zip(strokes, targets):
+        started = time.perf_counter()
+        index, _ = matcher.nearest(stroke)
+        timings.append(time.perf_counter() - started)
+        correct += index == target
+    timings = np.array(timings) * 1000
+
+    brute = time.perf_counter()
+    for stroke in strokes[:20]:
+        qx, qy = stroke.T.tolist()
+        for tx, ty in matcher.points:
+            dtw(qx, qy, tx, ty, matcher.radius)
+    brute = (time.perf_counter() - brute) / 20 * 1000
+
+    print(f"{templates} templates, band {matcher.radius} points, {queries} queries")
+    print(f"Pruned match: mean {timings.mean():.3f} ms  p50 {np.percentile(timings, 50):.3f} ms"
+          f"  p99 {np.percentile(timings, 99):.3f} ms")
+    print(f"DTW runs per match: {matcher.dtw_runs / queries:.1f} of {templates}")
+    print(f"Brute-force DTW: {brute:.1f} ms per match")
+    print(f"Accuracy: {correct / queries * 100:.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the DTW gesture matcher.")
+    parser.add_argument("--bench", action="store_true", help="run the matching benchmark")
+    parser.add_argument("--templates", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--band", type=float, default=BAND, help="band half-width as a fraction of the stroke")
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return 0
+    bench(args.templates, args.queries, args.band)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Evaluate
+--------
+Parallel accuracy and speed check of a config against a trace corpus.
+
+Each trace is replayed through InputListener callbacks and GestureController
+on a virtual clock, with actions sent to a no-op sink. Traces are sharded
+across a process pool and the per-shard results are merged into a confusion
+matrix, a false-fire rate and per-event callback latency percentiles.
+
+Usage::
+
+    python src/evaluate.py corpus/ --config config.json
+    python src/evaluate.py corpus/ --workers 16 --json report.json
+    python src/evaluate.py corpus/ --device-profiles profiles.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from gesture_controller import DeviceGestures, GestureController
+from input_listener import InputListener
+from traces import BUTTONS, LABELS, MOVE, PRESS, ReplayClock, read_trace, trace_files
+
+RESULTS = ("none", "up", "down", "left", "right")
+LATENCY_BUCKET_NS = 100   # Histogram resolution for per-event latency
+LATENCY_MAX_BUCKET = 100_000  # Everything above 10 ms lands in the last bucket
+
+
+class Replay:
+    """Wires InputListener and GestureController the same way the GUI does.
+
+    Each recording device gets its own listener and gesture state, so chords
+    from interleaved devices never mix. ``profiles`` and ``idle_timeout`` are
+    passed to DeviceGestures; the app itself has no per-device settings.
+    """
+
+    def __init__(self, config, profiles=None, idle_timeout=300.0):
+        from pynput import mouse
+
+        self.config = config
+        self.clock = ReplayClock()
+        self.controller = GestureController(
+            threshold=config.get("threshold", 120.0),
+            cooldown=config.get("cooldown", 0.5),
+            clock=self.clock
+        )
+        self.devices = DeviceGestures(self.controller, profiles=profiles, idle_timeout=idle_timeout)
+        self.listeners = {}
+        self.listener = self._listener(0)
+        self.buttons = [getattr(mouse.Button, name, None) if name else None for name in BUTTONS]
+        self.label = None
+        self.chord_labels = {}
+        self.fired = {}
+        self.result = new_result()
+
+    def _listener(self, device):
+        listener = self.listeners.get(device)
+        if listener is None:
+            if device:
+                callbacks = (lambda x, y: self.on_both_press(x, y, device),
+                             lambda x, y: self.on_move(x, y, device),
+                             lambda: self.on_release(device))
+            else:
+                callbacks = (self.on_both_press, self.on_move, self.on_release)
+            listener = InputListener(
+                *callbacks,
+                chord=self.config.get("chord_buttons", ["left", "right"]),
+                window=self.config.get("chord_window", 0.3),
+                clock=self.clock
+            )
+            self.listeners[device] = listener
+        return listener
+
+    def on_both_press(self, x, y, device=0):
+        self.chord_labels[device] = self.label
+        self.fired[device] = None
+        self.devices.get(device).start_gesture(x, y)
+
+    def on_move(self, x, y, device=0):
+        controller = self.devices.get(device) if device else self.controller
+        direction = controller.detect_direction(x, y)
+        if direction:
+            self.config.get(direction)  # No-op action sink
+            self.fired[device] = direction
+            self._finish_chord(device)
+            controller.end_gesture()
+
+    def on_release(self, device=0):
+        controller = self.devices.get(device)
+        if controller.active:
+            self._finish_chord(device)
+        controller.end_gesture()
+
+    def _finish_chord(self, device):
+        label = self.chord_labels.pop(device, None)
+        if label is None:
+            return
+        result = self.fired.get(device) or "none"
+        matrix = self.result["confusion"]
+        matrix[label][result] += 1
+
+    def run(self, events):
+        histogram = self.result["latency"]
+        perf_counter_ns = time.perf_counter_ns
+        for event in events:
+            self.clock.t = event.t
+            self.label = LABELS[event.label] if event.label < len(LABELS) else None
+            started = perf_counter_ns()
+            listener = self.listener if not event.device else self._listener(event.device)
+            if event.kind == MOVE:
+                listener.on_move(event.x, event.y)
+            else:
+                button = self.buttons[event.button] if event.button < len(self.buttons) else None
+                listener._on_click(event.x, event.y, button, event.kind == PRESS)
+            bucket = min((perf_counter_ns() - started) // LATENCY_BUCKET_NS, LATENCY_MAX_BUCKET)
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        self.result["events"] += len(events)
+
+
+def new_result():
+    return {
+        "traces": 0,
+        "events": 0,
+        "confusion": {label: {result: 0 for result in RESULTS} for label in LABELS},
+        "latency": {},
+    }
+
+
+def evaluate_shard(paths, config, profiles=None, idle_timeout=300.0):
+    """Replay one shard of traces and return its partial result."""
+    total = new_result()
+    for path in paths:
+        replay = Replay(config, profiles, idle_timeout)
+        replay.run(read_trace(path))
+        merge(total, replay.result)
+        total["traces"] += 1
+    return total
+
+
+def merge(total, part):
+    total["events"] += part["events"]
+    total["traces"] += part["traces"]
+    for label, row in part["confusion"].items():
+        for result, count in row.items():
+            total["confusion"][label][result] += count
+    for bucket, count in part["latency"].items():
+        total["latency"][bucket] = total["latency"].get(bucket, 0) + count
+    return total
+
+
+def percentile(histogram, fraction):
+    """Latency in microseconds at ``fraction`` of the bucketed histogram."""
+    count = sum(histogram.values())
+    if not count:
+        return 0.0
+    target = fraction * count
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= target:
+            return (bucket + 1) * LATENCY_BUCKET_NS / 1000
+    return LATENCY_MAX_BUCKET * LATENCY_BUCKET_NS / 1000
+
+
+def make_shards(paths, count):
+    """Split traces into ``count`` shards of roughly equal total size."""
+    shards = [[] for _ in range(count)]
+    sizes = [0] * count
+    for path in sorted(paths, key=os.path.getsize, reverse=True):
+        i = sizes.index(min(sizes))
+        shards[i].append(path)
+        sizes[i] += os.path.getsize(path)
+    return [shard for shard in shards if shard]
+
+
+def evaluate(paths, config, workers=None, profiles=None, idle_timeout=300.0):
+    workers = workers or os.cpu_count() or 1
+    total = new_result()
+    shards = make_shards(paths, workers * 4)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(evaluate_shard, shards, [config] * len(shards),
+                             [profiles] * len(shards), [idle_timeout] * len(shards)):
+            merge(total, part)
+    return summarize(total)
+
+
+def summarize(total):
+    matrix = total["confusion"]
+    chords = sum(sum(row.values()) for row in matrix.values())
+    false_fires = sum(count for label, row in matrix.items()
+                      for result, count in row.items()
+                      if result != "none" and result != label)
+    return {
+        "traces": total["traces"],
+        "events": total["events"],
+        "chords": chords,
+        "confusion": matrix,
+        "false_fire_rate": false_fires / chords if chords else 0.0,
+        "latency_us": {name: percentile(total["latency"], fraction)
+                       for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("p999", 0.999))},
+    }
+
+
+def print_report(report, elapsed):
+    print(f"Traces: {report['traces']}  Events: {report['events']}  Chords: {report['chords']}"
+          f"  ({elapsed:.1f}s, {report['events'] / elapsed if elapsed else 0:,.0f} events/s)")
+    print()
+    print("Confusion matrix (rows: intended, columns: recognized)")
+    print(f"{'':>8}" + "".join(f"{result:>8}" for result in RESULTS))
+    for label, row in report["confusion"].items():
+        if sum(row.values()):
+            print(f"{label:>8}" + "".join(f"{row[result]:>8}" for result in RESULTS))
+    print()
+    print(f"False-fire rate: {report['false_fire_rate'] * 100:.2f}%")
+    print("Per-event latency: " + "  ".join(
+        f"{name} {value:.1f} us" for name, value in report["latency_us"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a config against a trace corpus.")
+    parser.add_argument("corpus", help="trace file or directory of .trace files")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "config.json"))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--device-profiles", metavar="PATH",
+                        help="JSON of per-device threshold and cooldown for replayed traces")
+    parser.add_argument("--device-idle-timeout", type=float, default=300.0,
+                        help="seconds before an idle device's gesture state is dropped")
+    args = parser.parse_args(argv)
+
+    paths = trace_files(args.corpus)
+    if not paths:
+        print(f"No traces found in {args.corpus}")
+        return 1
+    with open(args.config, "r") as f:
+        config = json.load(f)
+    profiles = None
+    if args.device_profiles:
+        with open(args.device_profiles, "r") as f:
+            profiles = json.load(f)
+
+    started = time.perf_counter()
+    report = evaluate(paths, config, args.workers, profiles, args.device_idle_timeout)
+    print_report(report, time.perf_counter() - started)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
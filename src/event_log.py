@@ -0,0 +1,128 @@
+"""
+EventLog
+--------
+Structured gesture event log written off the hook thread.
+
+Callers only pay for a ``SimpleQueue.put``; a background writer drains the
+queue in batches and appends them as JSON lines to a size-rotated file.
+``drain_batches`` is the writer loop, shared with ``gesture_stats``.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+STOP = object()   # Queue sentinel: write what is pending, then return
+
+
+def drain_batches(items, write_batch, batch_size, flush_interval):
+    """Writer loop: pass queued items to ``write_batch`` in lists of up to ``batch_size``.
+
+    Blocks on ``items`` (a queue) and returns after the batch holding ``STOP``.
+    """
+    while True:
+        try:
+            item = items.get(timeout=flush_interval)
+        except queue.Empty:
+            continue
+
+        batch = []
+        stopping = False
+        while True:
+            if item is STOP:
+                stopping = True
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                break
+            try:
+                item = items.get_nowait()
+            except queue.Empty:
+                break
+
+        if batch:
+            write_batch(batch)
+        if stopping:
+            return
+
+
+class EventLog:
+    def __init__(self, directory, filename="events.jsonl", max_bytes=1_000_000,
+                 backup_count=3, batch_size=256, flush_interval=0.5, echo=False):
+        self.path = os.path.join(directory, filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.echo = echo
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._file = None
+
+    def log(self, event, **fields):
+        """Enqueue an event. Safe to call from the input hook thread."""
+        self._queue.put((time.time(), event, fields))
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="EventLogWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Flush pending events and stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _run(self):
+        drain_batches(self._queue, self._write_batch, self.batch_size, self.flush_interval)
+
+    def _write_batch(self, batch):
+        lines = []
+        for ts, event, fields in batch:
+            record = {"ts": round(ts, 6), "event": event}
+            record.update(fields)
+            lines.append(json.dumps(record, separators=(",", ":")))
+            if self.echo:
+                print(format_event(event, fields))
+
+        try:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"Error writing event log: {e}")
+
+    def _rotate(self):
+        """Rotate files the same way ``logging.handlers.RotatingFileHandler`` does."""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+
+
+def format_event(event, fields):
+    """Human-readable one-line rendering used for console echo in debug mode."""
+    if event == "action":
+        direction = fields.get("direction", "?")
+        action = fields.get("action", "")
+        return (f"[Gesture] Swipe {direction.upper()} → {action.replace('_', ' ').title()}"
+                f" ({fields.get('dispatch_ms', 0):.1f} ms)")
+    details = " ".join(f"{k}={v}" for k, v in fields.items())
+    return f"[Gesture] {event} {details}".rstrip()
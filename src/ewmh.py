@@ -0,0 +1,175 @@
+"""
+EWMH
+----
+Desktop actions on Linux through window manager client messages.
+
+Instead of faking Win+Ctrl+Arrow keystrokes, which need matching global
+keybindings, this backend asks the window manager directly with EWMH client
+messages: ``_NET_CURRENT_DESKTOP`` to switch desktops and
+``_NET_SHOWING_DESKTOP`` for ``task_view`` / ``close_task_view`` (X11 has no
+task view, so these show and hide the desktop). One X connection is kept
+open. The current desktop and desktop count are cached and kept up to date
+from PropertyNotify events on the root window, so a switch is a single
+request plus one sync round trip.
+
+Usage::
+
+    python src/ewmh.py --bench --count 200
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+from Xlib import X, Xatom, display as xdisplay, error
+from Xlib.protocol import event
+
+SWITCH_ACTIONS = {"desktop_left": -1, "desktop_right": 1}
+SHOW_ACTIONS = {"task_view": 1, "close_task_view": 0}
+NOTIFY_TIMEOUT = 0.5   # How long to wait for the PropertyNotify caused by our own switch
+
+
+class EWMHDesktop:
+    def __init__(self, name=None, require_wm=True):
+        self.display = xdisplay.Display(name)
+        self.root = self.display.screen().root
+        atom = lambda name: self.display.intern_atom(name)
+        self.current_atom = atom("_NET_CURRENT_DESKTOP")
+        self.number_atom = atom("_NET_NUMBER_OF_DESKTOPS")
+        self.showing_atom = atom("_NET_SHOWING_DESKTOP")
+        if require_wm:
+            supported = self.root.get_full_property(atom("_NET_SUPPORTED"), Xatom.ATOM)
+            if supported is None or self.current_atom not in supported.value:
+                self.display.close()
+                raise RuntimeError("The window manager does not support EWMH desktops")
+        # Xlib connections are not thread-safe; actions come from several threads
+        self._lock = threading.Lock()
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.current = 0
+        self.number = 1
+        self._expected = 0       # PropertyNotify events our own switches will cause
+        self._expected_until = 0.0
+        self._refresh()
+
+    def close(self):
+        with self._lock:
+            self.display.close()
+
+    def _cardinal(self, atom, default):
+        value = self.root.get_full_property(atom, Xatom.CARDINAL)
+        return int(value.value[0]) if value is not None and len(value.value) else default
+
+    def _refresh(self):
+        self.current = self._cardinal(self.current_atom, 0)
+        self.number = max(self._cardinal(self.number_atom, 1), 1)
+
+    def _drain_events(self):
+        """Refresh the cache only if someone else changed the desktop since the last action."""
+        stale = False
+        while self.display.pending_events():
+            e = self.display.next_event()
+            if e.type != X.PropertyNotify:
+                continue
+            if e.atom == self.current_atom and self._expected:
+                self._expected -= 1
+            elif e.atom in (self.current_atom, self.number_atom):
+                stale = True
+        if self._expected and time.monotonic() > self._expected_until:
+            # The window manager ignored a switch; do not swallow someone else's change
+            self._expected = 0
+            stale = True
+        if stale:
+            self._refresh()
+
+    def _send(self, atom, value):
+        message = event.ClientMessage(type=X.ClientMessage, window=self.root.id, client_type=atom,
+                                      data=(32, [value, X.CurrentTime, 0, 0, 0]))
+        self.root.send_event(message, event_mask=X.SubstructureRedirectMask | X.SubstructureNotifyMask)
+        self.display.sync()
+
+    def switch_to(self, desktop):
+        """Ask the window manager to show ``desktop``."""
+        with self._lock:
+            self._switch(desktop)
+
+    def _switch(self, desktop):
+        self._send(self.current_atom, desktop)
+        if desktop != self.current:
+            self._expected += 1
+            self._expected_until = time.monotonic() + NOTIFY_TIMEOUT
+        self.current = desktop
+
+    def perform(self, action):
+        """Perform ``action`` if it is a desktop action; returns False otherwise."""
+        if action in SWITCH_ACTIONS:
+            with self._lock:
+                self._drain_events()
+                # Like Win+Ctrl+Arrow: stop at the first and last desktop
+                target = min(max(self.current + SWITCH_ACTIONS[action], 0), self.number - 1)
+                if target != self.current:
+                    self._switch(target)
+            return True
+        if action in SHOW_ACTIONS:
+            with self._lock:
+                self._send(self.showing_atom, SHOW_ACTIONS[action])
+            return True
+        return False
+
+
+def bench(count=200, name=None):
+    """Compare desktop switch latency: EWMH client message vs injected keystrokes."""
+    # Under a bare Xvfb there is no window manager to act on the messages; the
+    # request and its round trip cost the same either way
+    desktop = EWMHDesktop(name, require_wm=False)
+    if name:
+        os.environ["DISPLAY"] = name   # For pynput's own connection
+    from pynput import keyboard
+    kb = keyboard.Controller()
+
+    def keystrokes(key):
+        with kb.pressed(keyboard.Key.cmd):
+            with kb.pressed(keyboard.Key.ctrl):
+                kb.press(key)
+                kb.release(key)
+        desktop.display.sync()   # The fake key events are processed by now
+
+    def measure(func):
+        samples = []
+        for i in range(count):
+            started = time.perf_counter()
+            func(i)
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+    # Alternate between two desktops so every switch is a real request
+    ewmh = measure(lambda i: desktop.switch_to(i % 2))
+    keys = measure(lambda i: keystrokes(keyboard.Key.right if i % 2 else keyboard.Key.left))
+    desktop.switch_to(0)
+    desktop.close()
+    print(f"{count} desktop switches")
+    print(f"EWMH client message: p50 {ewmh[0]:.3f} ms  p99 {ewmh[1]:.3f} ms")
+    print(f"Keystrokes:          p50 {keys[0]:.3f} ms  p99 {keys[1]:.3f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EWMH desktop actions.")
+    parser.add_argument("--bench", action="store_true", help="compare with the keystroke path")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--display", default=None, help="X display, e.g. :99 for Xvfb")
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return 0
+    try:
+        bench(args.count, args.display)
+    except error.DisplayError as e:
+        print(f"Cannot open X display: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
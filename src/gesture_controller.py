@@ -9,44 +9,204 @@ import time
 import math
 
 class GestureController:
-    def __init__(self, threshold=60, cooldown=0.5):
+    def __init__(self, threshold=60, cooldown=0.5, event_log=None, clock=time.time,
+                 templates=None, recognize_on_release=False):
         self.start_x = None
         self.start_y = None
+        self.start_time = 0
         self.active = False
+        self.suppressed = False
+        self.max_distance = 0.0
+        self.last_dx = 0
+        self.last_dy = 0
         self.last_gesture_time = 0
         self.threshold = threshold
         self.cooldown = cooldown
+        self.event_log = event_log
+        # Replaceable so recorded sessions can be replayed on a virtual clock
+        self.clock = clock
+        # Custom stroke templates, matched on release for strokes that did not
+        # already fire a direction at the threshold
+        self.templates = templates if templates else None
+        # Hold back directions too and recognize every stroke on release
+        self.recognize_on_release = recognize_on_release
+        self.path = []
 
     def start_gesture(self, x, y):
         self.start_x = x
         self.start_y = y
+        self.start_time = self.clock()
         self.active = True
+        self.suppressed = False
+        self.max_distance = 0.0
+        self.last_dx = 0
+        self.last_dy = 0
+        if self.templates:
+            self.path = [(x, y)]
+        if self.event_log:
+            self.event_log.log("gesture_start", x=x, y=y)
 
     def detect_direction(self, x, y):
         if not self.active:
             return None
 
-        now = time.time()
-        # ⏳ Cooldown guard
-        if now - self.last_gesture_time < self.cooldown:
-            return None
-
+        now = self.clock()
         dx = x - self.start_x
         dy = y - self.start_y
         distance = math.hypot(dx, dy)
+        self.last_dx = dx
+        self.last_dy = dy
+        if distance > self.max_distance:
+            self.max_distance = distance
+
+        if self.templates:
+            self.path.append((x, y))
+            if self.recognize_on_release:
+                return None
 
         if distance < self.threshold:
             return None
 
-        # Determine main direction
-        if abs(dx) > abs(dy):
-            direction = "right" if dx > 0 else "left"
-        else:
-            direction = "down" if dy > 0 else "up"
+        return self._fire(self.classify(dx, dy), distance, now)
+
+    def finish_gesture(self):
+        """Recognize the whole stroke on release when custom templates are loaded.
+
+        Only strokes still active get here; one that fired a direction at the
+        threshold has already been ended. Returns a template name, a direction
+        for strokes that match no template, or None.
+        """
+        if not self.active or not self.templates:
+            return None
+        if self.recognize_on_release:
+            if self.max_distance < self.threshold:
+                return None
+        elif sum(math.dist(a, b) for a, b in zip(self.path, self.path[1:])) < self.threshold:
+            # Drawn within the threshold, but long enough to be a custom gesture
+            return None
+
+        gesture = self.templates.match(self.path)
+        if gesture is None:
+            if math.hypot(self.last_dx, self.last_dy) < self.threshold:
+                return None
+            gesture = self.classify(self.last_dx, self.last_dy)
+        return self._fire(gesture, self.max_distance, self.clock())
+
+    def _fire(self, gesture, distance, now):
+        # ⏳ Cooldown guard
+        if now - self.last_gesture_time < self.cooldown:
+            # Log the suppression once per gesture, not on every move
+            if not self.suppressed:
+                self.suppressed = True
+                if self.event_log:
+                    self.event_log.log("cooldown_suppressed",
+                                       remaining=round(self.cooldown - (now - self.last_gesture_time), 3))
+            return None
 
         self.last_gesture_time = now
-        return direction
+        if self.event_log:
+            self.event_log.log("direction", direction=gesture, distance=round(distance, 1),
+                               elapsed_ms=round((now - self.start_time) * 1000, 2))
+        return gesture
+
+    @staticmethod
+    def classify(dx, dy):
+        """Determine the main direction of a displacement."""
+        if abs(dx) > abs(dy):
+            return "right" if dx > 0 else "left"
+        return "down" if dy > 0 else "up"
+
+    def attempt_summary(self):
+        """Outcome of the current gesture if it ends now without firing.
+
+        Returns ``(outcome, direction, distance, duration)`` where outcome is
+        ``"suppressed"`` if the threshold was reached during cooldown and
+        ``"rejected"`` otherwise.
+        """
+        outcome = "suppressed" if self.suppressed else "rejected"
+        direction = self.classify(self.last_dx, self.last_dy) if self.max_distance else None
+        return outcome, direction, self.max_distance, self.clock() - self.start_time
 
     def end_gesture(self):
         self.active = False
 
+
+class DeviceGestures:
+    """Gesture state sharded by input device, for replaying recorded traces.
+
+    Device 0 (unknown, or the only device) always uses ``default``. Other
+    devices get their own GestureController on first use, with threshold and
+    cooldown from ``profiles`` (device id -> {"threshold", "cooldown"}), and
+    lose it after ``idle_timeout`` seconds without a gesture. Callers on the
+    single-device path can skip the table entirely when the device is 0.
+    """
+
+    def __init__(self, default, profiles=None, idle_timeout=300.0):
+        self.default = default
+        self.threshold = default.threshold
+        self.cooldown = default.cooldown
+        self.profiles = {}
+        self.idle_timeout = idle_timeout
+        self.devices = {0: default}
+        self.evicted = 0
+        self._last_device = 0
+        self._last = default
+        self.configure(default.threshold, default.cooldown, default.event_log, profiles)
+
+    def get(self, device=0):
+        """Controller for ``device``, created on first use."""
+        if device == self._last_device:
+            return self._last
+        controller = self.devices.get(device)
+        if controller is None:
+            controller = self._create(device)
+        self._last_device = device
+        self._last = controller
+        return controller
+
+    def _create(self, device):
+        self.evict_idle()
+        default = self.default
+        controller = GestureController(event_log=default.event_log, clock=default.clock,
+                                       templates=default.templates,
+                                       recognize_on_release=default.recognize_on_release)
+        self._apply_profile(device, controller)
+        controller.start_time = controller.clock()   # Counts as used, so it is not evicted right away
+        self.devices[device] = controller
+        return controller
+
+    def _apply_profile(self, device, controller):
+        profile = self.profiles.get(device, {})
+        controller.threshold = profile.get("threshold", self.threshold)
+        controller.cooldown = profile.get("cooldown", self.cooldown)
+
+    def configure(self, threshold, cooldown, event_log=None, profiles=None, idle_timeout=None):
+        """Apply new global settings and per-device profiles to every live controller."""
+        self.threshold = threshold
+        self.cooldown = cooldown
+        if profiles is not None:
+            # JSON object keys are strings
+            self.profiles = {int(device): profile for device, profile in profiles.items()}
+        if idle_timeout is not None:
+            self.idle_timeout = idle_timeout
+        for device, controller in self.devices.items():
+            self._apply_profile(device, controller)
+            controller.event_log = event_log
+            controller.templates = self.default.templates
+            controller.recognize_on_release = self.default.recognize_on_release
+
+    def evict_idle(self):
+        """Drop controllers of devices that have been idle for ``idle_timeout``."""
+        now = self.default.clock()
+        for device, controller in list(self.devices.items()):
+            if (device and not controller.active
+                    and now - max(controller.start_time, controller.last_gesture_time) > self.idle_timeout):
+                del self.devices[device]
+                self.evicted += 1
+        if self._last_device not in self.devices:
+            self._last_device = 0
+            self._last = self.default
+
+    def end_all(self):
+        for controller in list(self.devices.values()):
+            controller.end_gesture()
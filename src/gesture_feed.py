@@ -0,0 +1,304 @@
+"""
+GestureFeed
+-----------
+Local publish/subscribe feed of recognized gestures.
+
+Other programs connect to a per-user Unix domain socket and receive every
+recognized gesture as a binary frame. Where ``AF_UNIX`` is missing the feed
+listens on an ephemeral loopback TCP port with a token, published through an
+endpoint file like the control channel; subscribers send the token first. Each
+frame is a little-endian ``uint32`` payload length, then the payload::
+
+    seq     uint32    per-feed sequence number; gaps mean dropped frames
+    t       float64   wall clock time, seconds since the epoch
+    device  uint8     input device id (0 if unknown)
+    name    utf-8     gesture name (the rest of the payload)
+
+Publishing never blocks: a frame is appended to a bounded per-subscriber
+buffer that drops its oldest frame when full, and one sender thread writes
+to the sockets without blocking. Whatever piled up for a subscriber goes out
+in a single send, so bursts are batched automatically.
+
+Usage::
+
+    python src/gesture_feed.py            # print gestures as they are recognized
+    python src/gesture_feed.py --bench
+"""
+
+import argparse
+import os
+import selectors
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+from control import connect, listen, local_address, token_matches, unlink
+
+BUFFER_FRAMES = 256
+LENGTH = struct.Struct("<I")
+EVENT = struct.Struct("<IdB")
+
+
+def feed_address():
+    """Return ``(family, address)`` of the feed socket (an endpoint file over TCP)."""
+    return local_address("feed")
+
+
+def encode(seq, t, device, gesture):
+    payload = EVENT.pack(seq & 0xFFFFFFFF, t, device) + gesture.encode()
+    return LENGTH.pack(len(payload)) + payload
+
+
+def decode(payload):
+    seq, t, device = EVENT.unpack_from(payload)
+    return seq, t, device, payload[EVENT.size:].decode()
+
+
+class _Subscriber:
+    def __init__(self, sock, buffer_frames):
+        self.sock = sock
+        self.frames = deque(maxlen=buffer_frames)
+        self.pending = b""   # Part of a batch the socket did not take yet
+        self.dropped = 0
+        self.hello = b""     # Token line received so far, until it is checked
+
+
+class GestureFeed:
+    def __init__(self, buffer_frames=BUFFER_FRAMES, address=None):
+        self.buffer_frames = buffer_frames
+        self.family, self.address = address or feed_address()
+        self.published = 0
+        self.dropped = 0
+        self.sends = 0   # Socket writes; fewer than frames delivered when bursts are batched
+        self.subscribers = []
+        self._lock = threading.Lock()
+        self._selector = None
+        self._sock = None
+        self._token = None
+        self._wake_r = self._wake_w = None
+        self._woken = False
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self.family == socket.AF_UNIX:
+            unlink(self.address)   # The control channel already made sure we are the only instance
+        sock, self._token = listen(self.family, self.address)
+        sock.setblocking(False)
+        self._sock = sock
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(sock, selectors.EVENT_READ, "accept")
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="GestureFeed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake()
+        self._thread.join(1.0)
+        # Also closes connections that have not sent their token yet
+        for key in list(self._selector.get_map().values()):
+            if isinstance(key.data, _Subscriber):
+                key.fileobj.close()
+        self.subscribers = []
+        self._selector.close()
+        self._sock.close()
+        self._wake_r.close()
+        self._wake_w.close()
+        unlink(self.address)
+
+    def publish(self, gesture, device=0):
+        """Queue a gesture for every subscriber (called on the dispatch path; never blocks)."""
+        if not self.subscribers:
+            return
+        with self._lock:
+            # Numbered under the lock: dispatch runs on the hook and scroll stepper threads
+            frame = encode(self.published, time.time(), device, gesture)
+            self.published += 1
+            for subscriber in self.subscribers:
+                if len(subscriber.frames) == self.buffer_frames:
+                    subscriber.dropped += 1
+                    self.dropped += 1
+                subscriber.frames.append(frame)
+        self._wake()
+
+    def stats(self):
+        return {"subscribers": len(self.subscribers), "published": self.published,
+                "dropped": self.dropped, "sends": self.sends}
+
+    def _wake(self):
+        # One wakeup byte per sender pass is enough
+        if not self._woken:
+            self._woken = True
+            try:
+                self._wake_w.send(b"\0")
+            except OSError:
+                pass
+
+    def _run(self):
+        while self._running:
+            for key, events in self._selector.select():
+                if key.data == "accept":
+                    self._accept()
+                elif key.data == "wake":
+                    try:
+                        self._wake_r.recv(4096)
+                    except OSError:
+                        pass
+                elif events & selectors.EVENT_READ:
+                    self._check_closed(key.data)
+            self._woken = False
+            for subscriber in list(self.subscribers):
+                self._flush(subscriber)
+
+    def _accept(self):
+        try:
+            conn, _ = self._sock.accept()
+        except OSError:
+            return
+        conn.setblocking(False)
+        subscriber = _Subscriber(conn, self.buffer_frames)
+        if not self._token:
+            self._add(subscriber)
+        self._selector.register(conn, selectors.EVENT_READ, subscriber)
+
+    def _add(self, subscriber):
+        with self._lock:
+            self.subscribers = self.subscribers + [subscriber]
+
+    def _check_closed(self, subscriber):
+        try:
+            data = subscriber.sock.recv(4096)   # Subscribers send nothing after the token
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._remove(subscriber)
+        elif self._token and subscriber not in self.subscribers:
+            self._check_token(subscriber, data)
+
+    def _check_token(self, subscriber, data):
+        subscriber.hello += data
+        line, newline, _ = subscriber.hello.partition(b"\n")
+        if not newline:
+            if len(subscriber.hello) > 256:
+                self._remove(subscriber)
+            return
+        if token_matches(line, self._token):
+            self._add(subscriber)   # Gets frames published from now on
+        else:
+            self._remove(subscriber)
+
+    def _remove(self, subscriber):
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if s is not subscriber]
+        self._selector.unregister(subscriber.sock)
+        subscriber.sock.close()
+
+    def _flush(self, subscriber):
+        if not subscriber.pending:
+            with self._lock:
+                if not subscriber.frames:
+                    return
+                subscriber.pending = b"".join(subscriber.frames)
+                subscriber.frames.clear()
+        try:
+            sent = subscriber.sock.send(subscriber.pending)
+            self.sends += 1
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._remove(subscriber)
+            return
+        subscriber.pending = subscriber.pending[sent:]
+        # Wait for the socket to become writable only while something is left over
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if subscriber.pending else 0)
+        self._selector.modify(subscriber.sock, events, subscriber)
+
+
+def subscribe(address=None):
+    """Yield ``(seq, t, device, gesture)`` tuples from the running app's feed."""
+    family, address = address or feed_address()
+    with connect(family, address) as sock:
+        with sock.makefile("rb") as stream:
+            while True:
+                header = stream.read(LENGTH.size)
+                if len(header) < LENGTH.size:
+                    return
+                payload = stream.read(LENGTH.unpack(header)[0])
+                yield decode(payload)
+
+
+def bench(events=20_000, burst=50, rate=5000, subscribers=3):
+    """Publish cost in bursts to readers plus one subscriber that never reads."""
+    family = socket.AF_UNIX if hasattr(socket, "AF_UNIX") else socket.AF_INET
+    address = (family, os.path.join(tempfile.mkdtemp(), "bench.feed"))
+    feed = GestureFeed(address=address)
+    feed.start()
+    received = [0] * subscribers
+
+    def reader(i):
+        for _ in subscribe(address):
+            received[i] += 1
+
+    for i in range(subscribers):
+        threading.Thread(target=reader, args=(i,), daemon=True).start()
+    stalled = connect(*address)
+    while len(feed.subscribers) < subscribers + 1:
+        time.sleep(0.01)
+
+    samples = []
+    started_all = time.perf_counter()
+    for i in range(events):
+        if i % burst == 0:
+            # Bursts of gestures at ``rate`` per second on average
+            delay = started_all + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        started = time.perf_counter()
+        feed.publish("right", 0)
+        samples.append(time.perf_counter() - started)
+    time.sleep(0.5)
+    samples.sort()
+    stats = feed.stats()
+    print(f"{events} gestures in bursts of {burst} to {subscribers} readers and 1 stalled subscriber")
+    print(f"publish p50 {samples[len(samples) // 2] * 1e6:.1f} us  "
+          f"p99 {samples[int(len(samples) * 0.99)] * 1e6:.1f} us  max {samples[-1] * 1e6:.1f} us")
+    print(f"received {received}, dropped {stats['dropped']} (stalled subscriber), "
+          f"{stats['sends']} socket writes")
+    stalled.close()
+    feed.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print gestures recognized by the running app.")
+    parser.add_argument("--bench", action="store_true", help="measure publish cost with a stalled subscriber")
+    args = parser.parse_args(argv)
+    if args.bench:
+        bench()
+        return 0
+    try:
+        for seq, t, device, gesture in subscribe():
+            print(f"{seq:8d}  {time.strftime('%H:%M:%S', time.localtime(t))}  device {device}  {gesture}",
+                  flush=True)
+    except (ConnectionError, FileNotFoundError):
+        print("Mouse Gesture Control is not running or its gesture feed is off.")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+GestureStats
+------------
+Local SQLite record of every gesture attempt.
+
+Attempts are queued from the hook thread and inserted by a background writer
+in batched transactions. Alongside the raw ``attempts`` table the writer keeps
+a ``totals`` rollup keyed by (outcome, direction), so the stats view reads a
+handful of rows no matter how many attempts have been recorded. The rollup
+counts attempts with a latency separately, since fired gestures without an
+action have none.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from event_log import STOP, drain_batches
+
+OUTCOMES = ("fired", "rejected", "suppressed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    direction TEXT,
+    distance REAL,
+    duration_ms REAL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_ts ON attempts(ts);
+CREATE INDEX IF NOT EXISTS idx_attempts_outcome ON attempts(outcome, direction, latency_ms);
+CREATE TABLE IF NOT EXISTS totals (
+    outcome TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    latency_sum REAL NOT NULL,
+    latency_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (outcome, direction)
+) WITHOUT ROWID;
+"""
+
+# Databases from before latency_count: add it and count the latencies already recorded
+_MIGRATE_LATENCY_COUNT = """
+ALTER TABLE totals ADD COLUMN latency_count INTEGER NOT NULL DEFAULT 0;
+UPDATE totals SET latency_count = (
+    SELECT COUNT(latency_ms) FROM attempts
+    WHERE attempts.outcome = totals.outcome AND COALESCE(attempts.direction, '') = totals.direction
+);
+"""
+
+
+class GestureStats:
+    def __init__(self, db_path, batch_size=500, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def record(self, outcome, direction=None, distance=0.0, duration=0.0, latency_ms=None):
+        """Queue one gesture attempt. Safe to call from the input hook thread."""
+        self._queue.put((time.time(), outcome, direction, distance, duration * 1000, latency_ms))
+
+    def start(self):
+        """Create the schema and start the background writer."""
+        if self._thread is not None:
+            return
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(totals)")]
+        if "latency_count" not in columns:
+            with conn:
+                conn.executescript(_MIGRATE_LATENCY_COUNT)
+        conn.close()
+        self._thread = threading.Thread(target=self._run, name="GestureStatsWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Write pending attempts and stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        conn = self._connect()
+
+        def write_batch(batch):
+            try:
+                self._write_batch(conn, batch)
+            except sqlite3.Error as e:
+                print(f"Error writing gesture stats: {e}")
+
+        try:
+            drain_batches(self._queue, write_batch, self.batch_size, self.flush_interval)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        rollup = {}
+        for _, outcome, direction, _, _, latency_ms in batch:
+            key = (outcome, direction or "")
+            count, latency_sum, latency_count = rollup.get(key, (0, 0.0, 0))
+            if latency_ms is not None:
+                latency_sum += latency_ms
+                latency_count += 1
+            rollup[key] = (count + 1, latency_sum, latency_count)
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO attempts (ts, outcome, direction, distance, duration_ms, latency_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?)", batch)
+            conn.executemany(
+                "INSERT INTO totals (outcome, direction, count, latency_sum, latency_count)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT(outcome, direction) DO UPDATE SET"
+                " count = count + excluded.count, latency_sum = latency_sum + excluded.latency_sum,"
+                " latency_count = latency_count + excluded.latency_count",
+                [(o, d, c, s, n) for (o, d), (c, s, n) in rollup.items()])
+
+    def summary(self, top=3):
+        """Return misfire rate, average dispatch latency and top gestures.
+
+        Reads only the ``totals`` rollup, so it stays instant on large databases.
+        Safe to call from the GUI thread while the writer is running.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=1.0)
+        try:
+            rows = conn.execute(
+                "SELECT outcome, direction, count, latency_sum, latency_count FROM totals").fetchall()
+        except sqlite3.Error:
+            rows = []
+        finally:
+            conn.close()
+
+        counts = {outcome: 0 for outcome in OUTCOMES}
+        fired_latency = 0.0
+        fired_with_latency = 0   # Fired gestures without an action have no latency
+        fired_by_direction = {}
+        for outcome, direction, count, latency_sum, latency_count in rows:
+            counts[outcome] = counts.get(outcome, 0) + count
+            if outcome == "fired":
+                fired_latency += latency_sum
+                fired_with_latency += latency_count
+                fired_by_direction[direction] = fired_by_direction.get(direction, 0) + count
+
+        total = sum(counts.values())
+        misfires = counts["rejected"] + counts["suppressed"]
+        top_gestures = sorted(fired_by_direction.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            "total": total,
+            "counts": counts,
+            "misfire_rate": misfires / total if total else 0.0,
+            "avg_latency_ms": fired_latency / fired_with_latency if fired_with_latency else 0.0,
+            "top_gestures": top_gestures,
+        }
@@ -0,0 +1,135 @@
+"""
+GestureTemplates
+----------------
+Custom stroke gestures learned from a handful of user demonstrations.
+
+Each stroke is resampled to a fixed number of points along its arc length,
+centered and scaled to unit RMS radius. Training averages the samples, drops
+outliers by their distance to the mean and stores the averaged template with
+an acceptance radius. All templates live in one ``.npz`` file as a single
+float16 array, so loading hundreds of them is one read.
+
+Strokes are compared point by point (``"mean"``) or, for large libraries and
+gestures drawn at uneven speed, with the pruned DTW search in
+``dtw_matcher.py`` (``"dtw"``).
+"""
+
+import os
+
+import numpy as np
+
+POINTS = 32
+MIN_SAMPLES = 5
+MIN_INLIERS = 3
+
+
+def resample(points, n=POINTS):
+    """Resample a stroke to ``n`` points evenly spaced along its path."""
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    seg = np.hypot(*np.diff(pts, axis=0).T)
+    cum = np.concatenate(([0.0], np.cumsum(seg)))
+    if len(pts) < 2 or cum[-1] == 0:
+        return np.zeros((n, 2))
+    targets = np.linspace(0.0, cum[-1], n)
+    return np.column_stack((np.interp(targets, cum, pts[:, 0]),
+                            np.interp(targets, cum, pts[:, 1])))
+
+
+def normalize(stroke):
+    """Center a resampled stroke on its centroid and scale to unit RMS radius."""
+    centered = stroke - stroke.mean(axis=-2, keepdims=True)
+    scale = np.sqrt((centered ** 2).sum(axis=-1).mean(axis=-1))
+    scale = np.where(scale > 0, scale, 1.0)
+    return centered / np.expand_dims(scale, (-1, -2))
+
+
+def distance(strokes, template):
+    """Mean point-to-point distance; broadcasts over leading dimensions."""
+    return np.linalg.norm(strokes - template, axis=-1).mean(axis=-1)
+
+
+def path_length(points):
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return float(np.hypot(*np.diff(pts, axis=0).T).sum()) if len(pts) > 1 else 0.0
+
+
+def train(samples):
+    """Build ``(template, radius)`` from recorded strokes.
+
+    Samples further than three median absolute deviations above the median
+    distance to the mean are rejected before the final average.
+    """
+    if len(samples) < MIN_SAMPLES:
+        raise ValueError(f"Record at least {MIN_SAMPLES} samples (got {len(samples)}).")
+
+    strokes = normalize(np.stack([resample(sample) for sample in samples]))
+    dists = distance(strokes, strokes.mean(axis=0))
+    median = np.median(dists)
+    mad = np.median(np.abs(dists - median))
+    inliers = strokes[dists <= median + 3 * max(mad, 0.01)]
+    if len(inliers) < MIN_INLIERS:
+        raise ValueError("Samples are too inconsistent; record the gesture again.")
+
+    template = normalize(inliers.mean(axis=0))
+    radius = max(float(distance(inliers, template).max()) * 1.5, 0.15)
+    return template, radius
+
+
+class TemplateSet:
+    def __init__(self, path, matcher="mean"):
+        self.path = path
+        self.matcher = matcher
+        self.names = []
+        self.templates = np.zeros((0, POINTS, 2), dtype=np.float32)
+        self.radii = np.zeros(0, dtype=np.float32)
+        self._dtw = None   # DTW index, rebuilt after the templates change
+
+    def __len__(self):
+        return len(self.names)
+
+    def load(self):
+        """Load templates from disk; a missing file means no custom gestures."""
+        if not os.path.exists(self.path):
+            return self
+        with np.load(self.path) as data:
+            self.names = [str(name) for name in data["names"]]
+            self.templates = data["templates"].astype(np.float32)
+            self.radii = data["radii"].astype(np.float32)
+        self._dtw = None
+        return self
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path,
+                 names=np.array(self.names, dtype=str),
+                 templates=self.templates.astype(np.float16),
+                 radii=self.radii.astype(np.float16))
+        os.replace(tmp_path, self.path)
+
+    def add(self, name, samples):
+        """Train a template from samples and add or replace ``name``."""
+        template, radius = train(samples)
+        if name in self.names:
+            i = self.names.index(name)
+            self.templates[i] = template
+            self.radii[i] = radius
+        else:
+            self.names.append(name)
+            self.templates = np.concatenate((self.templates, template[None].astype(np.float32)))
+            self.radii = np.append(self.radii, np.float32(radius))
+        self._dtw = None
+
+    def match(self, points):
+        """Return the name of the closest template within its radius, or None."""
+        if not self.names or len(points) < 2:
+            return None
+        if self.matcher == "dtw":
+            if self._dtw is None:
+                from dtw_matcher import DTWMatcher
+                self._dtw = DTWMatcher(self.templates, self.radii)
+            best = self._dtw.match(points)
+            return self.names[best] if best is not None else None
+        stroke = normalize(resample(points))
+        dists = distance(self.templates, stroke)
+        best = int(np.argmin(dists))
+        return self.names[best] if dists[best] <= self.radii[best] else None
@@ -0,0 +1,391 @@
+"""
+HookProcess
+-----------
+Optional split of the input hook into its own process.
+
+The hook process runs only InputListener: it captures input, detects the
+chord and writes chord starts, moves during a chord, scroll steps and chord
+ends into a shared memory ring buffer. The app reads the ring on a consumer
+thread and calls the usual gesture callbacks, so GIL contention from the Tk
+main loop, the tray thread or action dispatch can no longer delay the hook
+callback itself. The app controls the hook process through its stdin (one
+JSON message per line) and is woken through its stdout only when the
+consumer is idle.
+
+HookClient has the same interface as InputListener, so the listener
+supervisor restarts a dead or stuck hook process like any other listener.
+
+Usage::
+
+    python src/hook_process.py --bench
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import struct
+from multiprocessing import shared_memory
+
+HOOK_FLAG = "--hook-process"
+CAPACITY = 4096
+RECORD = struct.Struct("<dIfff")   # perf_counter time, kind, x, y, value
+HEADER_FIELDS = 4                  # head, waiting, capacity, reserved (uint64 each)
+HEAD, WAITING, SLOTS = 0, 1, 2
+CHORD_START, MOVE, CHORD_END, SCROLL = range(4)
+
+
+class RingBuffer:
+    """Single-producer, single-consumer ring of fixed-size records in shared memory.
+
+    The producer writes a record and then advances ``head``; the consumer keeps
+    its own tail. A consumer that falls more than ``capacity`` records behind
+    skips the overwritten ones and counts them as dropped.
+    """
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.header = shm.buf[:HEADER_FIELDS * 8].cast("Q")
+        self.records = shm.buf[HEADER_FIELDS * 8:]
+        self.capacity = self.header[SLOTS]
+
+    @classmethod
+    def create(cls, capacity=CAPACITY):
+        shm = shared_memory.SharedMemory(create=True, size=HEADER_FIELDS * 8 + capacity * RECORD.size)
+        header = shm.buf[:HEADER_FIELDS * 8].cast("Q")
+        header[HEAD] = header[WAITING] = 0
+        header[SLOTS] = capacity
+        header.release()
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name, track=False)
+        except TypeError:
+            # Python < 3.13 would unlink the creator's segment when this process exits
+            shm = shared_memory.SharedMemory(name)
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, kind, x=0.0, y=0.0, value=0.0):
+        """Append a record; returns True if the consumer is waiting for a wakeup."""
+        header = self.header
+        head = header[HEAD]
+        RECORD.pack_into(self.records, (head % self.capacity) * RECORD.size,
+                         time.perf_counter(), kind, x, y, value)
+        header[HEAD] = head + 1
+        if header[WAITING]:
+            header[WAITING] = 0
+            return True
+        return False
+
+    def read(self, tail):
+        """Return ``(records, new_tail, dropped)`` for everything after ``tail``."""
+        head = self.header[HEAD]
+        dropped = 0
+        if head - tail > self.capacity:
+            dropped = head - tail - self.capacity
+            tail = head - self.capacity
+        records = [RECORD.unpack_from(self.records, (i % self.capacity) * RECORD.size)
+                   for i in range(tail, head)]
+        # Records the producer lapped while we copied them are unreliable
+        lapped = self.header[HEAD] - self.capacity - tail
+        if lapped > 0:
+            records = records[lapped:]
+            dropped += lapped
+        return records, head, dropped
+
+    def close(self, unlink=False):
+        self.header.release()
+        self.records.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def hook_command(ring_name, options):
+    """Command line that starts a hook process."""
+    arguments = [HOOK_FLAG, ring_name, json.dumps(options)]
+    if getattr(sys, "frozen", False):
+        return [sys.executable] + arguments   # The packaged executable handles the flag (main_gui.py)
+    return [sys.executable, os.path.abspath(__file__)] + arguments
+
+
+class HookClient:
+    """App side of the split hook: drop-in replacement for InputListener."""
+
+    def __init__(self, on_both_press, on_move, on_release,
+                 chord=("left", "right"), modifier=None, window=None, hold=None,
+                 on_scroll=None, capacity=CAPACITY):
+        self.on_both_press = on_both_press
+        self.on_move = on_move
+        self.on_release = on_release
+        self.on_scroll = on_scroll
+        self.options = {"chord": list(chord), "modifier": modifier, "window": window,
+                        "hold": hold, "scroll": on_scroll is not None}
+        self.capacity = capacity
+        self.ring = None
+        self.process = None
+        self.thread = None
+        self.active = False
+        self.chord_gap = 0.0
+        # For the hook process this is the delivery time from hook to consumer
+        self.detect_latency = 0.0
+        self.busy_since = 0.0
+        self.dropped = 0
+        self.wakeups = 0   # Consumer wakeups (power_saver.PowerMeter)
+        self._running = False
+
+    def start(self):
+        self.ring = RingBuffer.create(self.capacity)
+        self.process = subprocess.Popen(hook_command(self.ring.name, self.options),
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._running = True
+        self.thread = threading.Thread(target=self._consume, name="HookConsumer", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self._running = False
+        if self.process:
+            try:
+                self.process.stdin.close()   # The hook process exits on EOF
+                self.process.wait(2.0)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        if self.thread:
+            self.thread.join(1.0)
+            self.thread = None
+        if self.ring:
+            self.ring.close(unlink=True)
+            self.ring = None
+
+    def configure(self, chord=("left", "right"), window=None):
+        """Send the new chord and press window to the hook process."""
+        self.options.update(chord=list(chord), window=window)
+        self.active = False
+        try:
+            self.process.stdin.write(json.dumps({"configure": self.options}).encode() + b"\n")
+        except OSError as e:
+            print(f"Failed to configure hook process: {e}")
+
+    def is_alive(self):
+        return (self.process is not None and self.process.poll() is None
+                and self.thread is not None and self.thread.is_alive())
+
+    def click_delay_stats(self):
+        return None   # Deferred clicks are replayed inside the hook process
+
+    def _consume(self):
+        ring = self.ring
+        wake = self.process.stdout
+        tail = 0
+        while self._running:
+            if ring.header[HEAD] == tail:
+                # Ask for a wakeup, then check again so a record written meanwhile is not missed
+                ring.header[WAITING] = 1
+                if ring.header[HEAD] == tail:
+                    if not wake.read(1):
+                        return   # Hook process exited
+                continue
+            records, tail, dropped = ring.read(tail)
+            self.wakeups += 1
+            self.dropped += dropped
+            for t, kind, x, y, value in records:
+                self.busy_since = time.perf_counter()
+                try:
+                    self._deliver(t, kind, x, y, value)
+                finally:
+                    self.busy_since = 0.0
+
+    def _deliver(self, t, kind, x, y, value):
+        if kind == MOVE:
+            self.on_move(x, y)
+        elif kind == CHORD_START:
+            self.active = True
+            self.chord_gap = value
+            self.detect_latency = time.perf_counter() - t
+            self.on_both_press(x, y)
+        elif kind == CHORD_END:
+            self.active = False
+            self.on_release()
+        elif kind == SCROLL and self.on_scroll:
+            self.on_scroll(value)
+
+
+def serve_hook(ring_name, options):
+    """Hook process main: run InputListener and stream chord samples into the ring."""
+    from input_listener import InputListener
+
+    ring = RingBuffer.attach(ring_name)
+    wake = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+    sys.stdout = sys.stderr   # Keep prints off the wakeup channel
+
+    def push(kind, x=0.0, y=0.0, value=0.0):
+        if ring.write(kind, x, y, value):
+            wake.write(b"\x01")
+            wake.flush()
+
+    listener = None
+
+    def on_move(x, y):
+        if listener.active:
+            push(MOVE, x, y)
+
+    listener = InputListener(
+        on_both_press=lambda x, y: push(CHORD_START, x, y, listener.chord_gap),
+        on_move=on_move,
+        on_release=lambda: push(CHORD_END),
+        chord=options["chord"],
+        modifier=options.get("modifier"),
+        window=options.get("window"),
+        hold=options.get("hold"),
+        on_scroll=(lambda dy: push(SCROLL, value=dy)) if options.get("scroll") else None,
+    )
+    listener.start()
+    try:
+        for line in sys.stdin:
+            message = json.loads(line)
+            if "configure" in message:
+                listener.configure(chord=message["configure"]["chord"],
+                                   window=message["configure"]["window"])
+    finally:
+        listener.stop()
+        ring.close()
+    return 0
+
+
+# Benchmark: hook-callback latency under synthetic GUI load, in-process vs split
+
+def gui_load(stop):
+    """Stand-in for busy Tk callbacks: pure-Python work that holds the GIL."""
+    while not stop.is_set():
+        sum(i * i for i in range(20000))
+
+
+def feed(callback, rate, count):
+    """Emulate the OS hook thread delivering ``count`` moves at ``rate`` Hz.
+
+    Returns the latency of each callback, measured from when the event was due.
+    """
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        due = started + i / rate
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)   # Releases the GIL, like waiting for the next OS event
+        callback(float(i % 500), 0.0)
+        latencies.append(time.perf_counter() - due)
+    return latencies
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    if not values:
+        return {}
+    pick = lambda fraction: values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+    return {"p50_ms": round(pick(0.5), 3), "p99_ms": round(pick(0.99), 3),
+            "max_ms": round(values[-1] * 1000, 3), "count": len(values)}
+
+
+def bench_feeder(ring_name, result_path, rate, count):
+    """Child side of the split benchmark: the hook callback only writes to the ring."""
+    ring = RingBuffer.attach(ring_name)
+    wake = sys.stdout.buffer
+
+    def callback(x, y):
+        if ring.write(MOVE, x, y):
+            wake.write(b"\x01")
+            wake.flush()
+
+    latencies = feed(callback, rate, count)
+    ring.write(CHORD_END)
+    wake.write(b"\x01")
+    wake.flush()
+    ring.close()
+    with open(result_path, "w") as f:
+        json.dump(summarize(latencies), f)
+    return 0
+
+
+def bench(rate=1000, seconds=3.0, threshold=120.0):
+    from gesture_controller import GestureController
+
+    count = int(rate * seconds)
+    stop = threading.Event()
+    load = threading.Thread(target=gui_load, args=(stop,), daemon=True)
+    load.start()
+
+    # Before: the hook callback runs the recognizer in the GUI process
+    controller = GestureController(threshold=threshold, cooldown=0.0)
+    controller.start_gesture(0.0, 0.0)
+    before = summarize(feed(controller.detect_direction, rate, count))
+
+    # After: the hook process only writes the ring; a consumer thread here recognizes
+    ring = RingBuffer.create()
+    result_path = os.path.join(tempfile.mkdtemp(), "hook_bench.json")
+    command = [sys.executable, os.path.abspath(__file__), "--bench-feeder",
+               ring.name, result_path, str(rate), str(count)]
+    delivery = []
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=0)
+    tail = 0
+    done = False
+    while not done:
+        if ring.header[HEAD] == tail:
+            ring.header[WAITING] = 1
+            if ring.header[HEAD] == tail and not process.stdout.read(1):
+                break
+            continue
+        records, tail, _ = ring.read(tail)
+        now = time.perf_counter()
+        for t, kind, x, y, value in records:
+            if kind == CHORD_END:
+                done = True
+                break
+            controller.detect_direction(x, y)
+            delivery.append(now - t)
+    process.wait()
+    stop.set()
+    ring.close(unlink=True)
+    with open(result_path) as f:
+        after = json.load(f)
+    os.remove(result_path)
+
+    print(f"{count} moves at {rate} Hz with a GIL-heavy GUI thread running")
+    print(f"In-process hook callback:  {before}")
+    print(f"Hook process callback:     {after}")
+    print(f"Hook to recognizer (split): {summarize(delivery)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == HOOK_FLAG:
+        return serve_hook(argv[1], json.loads(argv[2]))
+    if argv and argv[0] == "--bench-feeder":
+        return bench_feeder(argv[1], argv[2], int(argv[3]), int(argv[4]))
+
+    parser = argparse.ArgumentParser(description="Benchmark the split input hook.")
+    parser.add_argument("--bench", action="store_true", help="compare hook latency in-process and split")
+    parser.add_argument("--rate", type=int, default=1000, help="mouse polling rate in Hz")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.print_help()
+        return 0
+    bench(args.rate, args.seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,48 +1,259 @@
-
 """
 InputListener
 -------------
 Listens for global mouse events using pynput.
-Detects when both left and right buttons are pressed.
+Detects configurable button chords (any combination of left, right, middle,
+X1 and X2, optionally with a held keyboard modifier) and reports wheel
+scrolling while a chord is held.
 """
 
-from pynput import mouse
+import sys
+import time
+
+from pynput import keyboard, mouse
+
+from click_deferral import ClickReplayer
+
+BUTTON_BITS = {"left": 1, "right": 2, "middle": 4, "x1": 8, "x2": 16}
+
+MODIFIER_KEYS = {
+    "ctrl": ("ctrl", "ctrl_l", "ctrl_r"),
+    "alt": ("alt", "alt_l", "alt_r", "alt_gr"),
+    "shift": ("shift", "shift_l", "shift_r"),
+    "cmd": ("cmd", "cmd_l", "cmd_r"),
+}
+
+# Low-level mouse hook messages -> (button name, pressed), used for suppression on Windows
+WIN32_BUTTON_MESSAGES = {
+    0x0201: ("left", True), 0x0202: ("left", False),
+    0x0204: ("right", True), 0x0205: ("right", False),
+    0x0207: ("middle", True), 0x0208: ("middle", False),
+    0x020B: ("x", True), 0x020C: ("x", False),
+}
+WM_MOUSEWHEEL = 0x020A
+WHEEL_DELTA = 120
+LLMHF_INJECTED = 0x01
+
+
+def chord_mask(buttons):
+    """Bitmask for a list of button names."""
+    mask = 0
+    for name in buttons:
+        if name not in BUTTON_BITS:
+            raise ValueError(f"Unknown chord button: {name}")
+        mask |= BUTTON_BITS[name]
+    return mask
 
 
 class InputListener:
-    def __init__(self, on_both_press, on_move, on_release):
-        self.left_pressed = False
-        self.right_pressed = False
+    def __init__(self, on_both_press, on_move, on_release,
+                 chord=("left", "right"), modifier=None, window=None, clock=time.time,
+                 hold=None, on_scroll=None):
+        # Button state is a bitmask so every press/release is an O(1) update
+        self.pressed = 0
+        self.chord = chord_mask(chord)
+        # All chord buttons must go down within ``window`` seconds (None: no limit)
+        self.window = window
+        self.clock = clock
+        self.first_press_time = 0.0
+        self.active = False
+        # Chord-detection latency: gap between the first and completing press,
+        # and time spent recognizing the chord inside the callback
+        self.chord_gap = 0.0
+        self.detect_latency = 0.0
+        # perf_counter() when the running callback started, 0 when idle (for the watchdog)
+        self.busy_since = 0.0
+        # Hook callbacks so far (power_saver.PowerMeter)
+        self.wakeups = 0
+
+        self.button_bits = {getattr(mouse.Button, name): bit
+                            for name, bit in BUTTON_BITS.items()
+                            if hasattr(mouse.Button, name)}
+
+        # Deferred pass-through: hold the first chord button for up to ``hold``
+        # seconds. Per-event suppression is only available on Windows.
+        self.replayer = None
+        self.swallowed = 0
+        listener_options = {}
+        if hold and sys.platform == "win32":
+            controller = mouse.Controller()
+            self.replayer = ClickReplayer(
+                lambda button, pressed: controller.press(button) if pressed else controller.release(button),
+                hold=hold)
+            listener_options["win32_event_filter"] = self._win32_filter
         self.listener = mouse.Listener(
-            on_click=self._on_click, on_move=on_move)
+            on_click=self._on_click, on_move=self._on_move,
+            on_scroll=self._on_scroll if on_scroll else None, **listener_options)
+
+        self.modifier_keys = frozenset(getattr(keyboard.Key, name)
+                                       for name in MODIFIER_KEYS.get(modifier, ())
+                                       if hasattr(keyboard.Key, name))
+        if modifier and not self.modifier_keys:
+            raise ValueError(f"Unknown chord modifier: {modifier}")
+        self.modifiers_down = set()
+        self.keyboard_listener = None
+        if self.modifier_keys:
+            self.keyboard_listener = keyboard.Listener(
+                on_press=self._on_key_press, on_release=self._on_key_release)
+
         self.on_both_press = on_both_press
+        self.on_move = on_move
         self.on_release = on_release
+        self.on_scroll = on_scroll
+
+    def _on_key_press(self, key):
+        if key in self.modifier_keys:
+            self.modifiers_down.add(key)
+
+    def _on_key_release(self, key):
+        self.modifiers_down.discard(key)
+
+    def configure(self, chord=("left", "right"), window=None):
+        """Change the chord and press window in place, without a new hook."""
+        self.chord = chord_mask(chord)
+        self.window = window
+        self.active = False
+
+    def _on_move(self, x, y):
+        self.wakeups += 1
+        self.busy_since = time.perf_counter()
+        try:
+            self.on_move(x, y)
+        finally:
+            self.busy_since = 0.0
+
+    def _on_scroll(self, x, y, dx, dy):
+        self.wakeups += 1
+        # Only wheel input during a chord is ours; everything else passes through
+        if self.active:
+            self.busy_since = time.perf_counter()
+            try:
+                self.on_scroll(dy)
+            finally:
+                self.busy_since = 0.0
 
     def _on_click(self, x, y, button, pressed):
-        # Store previous state to detect simultaneous clicks
-        prev_left = self.left_pressed
-        prev_right = self.right_pressed
-        
-        # Update button states
-        if button == mouse.Button.left:
-            self.left_pressed = pressed
-        elif button == mouse.Button.right:
-            self.right_pressed = pressed
-
-        # Handle button press events
+        self.wakeups += 1
+        entered = self.busy_since = time.perf_counter()
+        try:
+            self._update_buttons(x, y, button, pressed, entered)
+        finally:
+            self.busy_since = 0.0
+        return True
+
+    def _update_buttons(self, x, y, button, pressed, entered):
+        bit = self.button_bits.get(button, 0)
+
         if pressed:
-            # Check if both buttons are being pressed within a short time
-            if (button == mouse.Button.left and prev_right) or \
-               (button == mouse.Button.right and prev_left):
+            now = self.clock()
+            if not self.pressed & self.chord:
+                self.first_press_time = now
+            self.pressed |= bit
+
+            if not self.active and bit & self.chord and self._chord_complete(now):
+                self.active = True
+                self.chord_gap = now - self.first_press_time
+                self.detect_latency = time.perf_counter() - entered
                 self.on_both_press(x, y)
-                return True  # Consume the event
-        
-        # Handle button release
-        if not pressed and (not self.left_pressed or not self.right_pressed):
-            self.on_release()
-            
-        return True  # Always consume the event to prevent system actions
+        else:
+            self.pressed &= ~bit
+            # Handle button release
+            if self.active and bit & self.chord:
+                self.active = False
+                self.on_release()
+
+    def _chord_complete(self, now):
+        """Whether the buttons held at ``now`` (the last press) make a valid chord."""
+        return (self.pressed & self.chord == self.chord
+                and (self.window is None or now - self.first_press_time <= self.window)
+                and (not self.modifier_keys or self.modifiers_down))
+
+    def resume(self, pressed, first_press_time, last_press_time, position):
+        """Take over the button state of a parked click watcher (see power_saver.py).
+
+        Waits until the hook is installed. A chord completed before that is
+        reported now, at the position of its last press.
+        """
+        self.listener.wait()
+        if not self.pressed & self.chord:
+            self.first_press_time = first_press_time
+        self.pressed |= pressed
+        if not self.active and self._chord_complete(last_press_time):
+            self.active = True
+            self.chord_gap = last_press_time - self.first_press_time
+            # Includes installing the hook
+            self.detect_latency = self.clock() - last_press_time
+            self.on_both_press(*position)
+
+    def _win32_filter(self, msg, data):
+        """Decide on chord-button events before Windows delivers them.
+
+        Chord-button events are handled here and suppressed; whatever should
+        still reach the system is re-injected by the replayer. Returning False
+        skips the regular callbacks without suppressing the event.
+        """
+        if data.flags & LLMHF_INJECTED:
+            return False  # Our own replayed events
+        if msg == WM_MOUSEWHEEL:
+            if not (self.active and self.on_scroll):
+                return True
+            # Keep chord scrolling away from the window under the cursor
+            delta = (data.mouseData >> 16) & 0xFFFF
+            if delta >= 0x8000:
+                delta -= 0x10000
+            self._on_scroll(data.pt.x, data.pt.y, 0, delta / WHEEL_DELTA)
+            self.listener.suppress_event()
+        decoded = WIN32_BUTTON_MESSAGES.get(msg)
+        if decoded is None:
+            return True
+        name, pressed = decoded
+        if name == "x":
+            name = "x1" if (data.mouseData >> 16) == 1 else "x2"
+        bit = BUTTON_BITS[name]
+        if not bit & self.chord:
+            return True
+
+        button = getattr(mouse.Button, name)
+        was_active = self.active
+        first = pressed and not self.pressed & self.chord
+        self._on_click(data.pt.x, data.pt.y, button, pressed)
+
+        if pressed:
+            if self.active and not was_active:
+                # Chord completed: swallow it along with the held first press
+                dropped = self.replayer.swallow_held()
+                self.swallowed = bit | self.button_bits.get(dropped, 0)
+            elif first and not self.active:
+                self.replayer.hold_press(button)
+            else:
+                self.replayer.replay(button, True)
+        elif self.swallowed & bit:
+            self.swallowed &= ~bit
+        else:
+            # Replays a still-held press first, keeping the original click timing
+            self.replayer.replay(button, False)
+        self.listener.suppress_event()
+
+    def click_delay_stats(self):
+        """Latency added to ordinary clicks by deferred pass-through, or None."""
+        return self.replayer.stats() if self.replayer else None
+
+    def is_alive(self):
+        """Return True while the hook thread is running."""
+        return self.listener.is_alive()
 
     def start(self):
         """Start listening for mouse input."""
+        if self.replayer:
+            self.replayer.start()
         self.listener.start()
+        if self.keyboard_listener:
+            self.keyboard_listener.start()
+
+    def stop(self):
+        """Stop listening for mouse and keyboard input."""
+        self.listener.stop()
+        if self.keyboard_listener:
+            self.keyboard_listener.stop()
+        if self.replayer:
+            self.replayer.stop()
@@ -0,0 +1,286 @@
+"""
+Launcher
+--------
+Runs command and script actions through pre-spawned helper processes.
+
+Each helper is a small Python process started ahead of time, so a gesture only
+sends it a job over a pipe instead of paying for interpreter startup. Commands
+are started directly (no shell unless ``"shell": true``), and Python entry
+points (``"module:function"``) are called inside the warm helper. The pool
+caps concurrent launches at the number of helpers, queues a bounded number of
+jobs and rejects the rest. ``timeout`` only covers the launch: a job that has
+not started by then counts as a timeout and its helper is replaced. A started
+command is left running and the helper takes the next job; an entry point
+keeps its helper until it returns. Nothing is stopped for running long unless
+the action sets ``max_runtime``. Launch latency (gesture to process started)
+is kept per action.
+
+Command specs in ``config.json``::
+
+    "commands": {
+        "screenshot": {"command": "gnome-screenshot -a", "timeout": 30},
+        "notes": {"entry_point": "mytools.notes:open_today", "args": ["--quick"]},
+        "sync": {"command": "rsync -a notes/ backup/", "max_runtime": 600}
+    }
+"""
+
+import importlib
+import json
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+LATENCY_SAMPLES = 200
+START_TIMEOUT = 10.0   # Default for a job to be reported started
+HELPER_FLAG = "--launcher-helper"
+
+
+def helper_command():
+    """Command line that starts a helper process."""
+    if getattr(sys, "frozen", False):
+        # Packaged app: the executable handles the flag itself (see main_gui.py)
+        return [sys.executable, HELPER_FLAG]
+    return [sys.executable, os.path.abspath(__file__), HELPER_FLAG]
+
+
+def _watch(process, max_runtime):
+    """Reap a started command, killing it after ``max_runtime`` seconds if set."""
+    try:
+        process.wait(max_runtime)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        print(f"Command {process.args!r} killed after {max_runtime}s")
+
+
+def serve():
+    """Helper process loop: read JSON jobs from stdin, run one at a time, reply on stdout."""
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    sys.stdout = sys.stderr   # Keep prints from entry points off the reply channel
+    sys.path.insert(0, os.getcwd())   # Entry point modules live in the working directory
+
+    def reply(*message):
+        replies.write(json.dumps(message) + "\n")
+
+    for line in sys.stdin:
+        job = json.loads(line)
+        try:
+            if "entry_point" in job:
+                module_name, _, func_name = job["entry_point"].partition(":")
+                func = getattr(importlib.import_module(module_name), func_name or "main")
+                reply("started", None)
+                try:
+                    func(*job.get("args", ()))
+                except SystemExit as e:
+                    # sys.exit() in an entry point ends the call, not the helper
+                    code = e.code if e.code is None or isinstance(e.code, int) else 1
+                    reply("done", code or 0)
+                except BaseException as e:
+                    reply("error", f"{type(e).__name__}: {e}")
+                else:
+                    reply("done", 0)
+            else:
+                command = job["command"]
+                shell = job.get("shell", False)
+                if isinstance(command, str) and not shell:
+                    command = shlex.split(command, posix=os.name != "nt")
+                process = subprocess.Popen(command, shell=shell, cwd=job.get("cwd"),
+                                           stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL)
+                reply("started", process.pid)
+                threading.Thread(target=_watch, args=(process, job.get("max_runtime")),
+                                 name="CommandWatch", daemon=True).start()
+        except Exception as e:
+            reply("error", f"{type(e).__name__}: {e}")
+    return 0
+
+
+class _Helper:
+    """One pre-spawned helper process and a thread collecting its replies."""
+
+    def __init__(self, cwd):
+        self.cwd = cwd
+        self.process = None
+        self.replies = None
+
+    def spawn(self):
+        self.replies = queue.Queue()
+        self.process = subprocess.Popen(helper_command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        text=True, bufsize=1, cwd=self.cwd)
+        threading.Thread(target=self._read, args=(self.process, self.replies),
+                         name="LauncherReader", daemon=True).start()
+
+    @staticmethod
+    def _read(process, replies):
+        for line in process.stdout:
+            replies.put(json.loads(line))
+        replies.put(None)   # Helper exited
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, job):
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+
+    def receive(self, timeout=None):
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+    def respawn(self):
+        """Replace a stuck or dead helper right away so the next job finds it warm."""
+        self.kill()
+        self.spawn()
+
+
+class LauncherPool:
+    def __init__(self, workers=2, max_pending=8, timeout=START_TIMEOUT, max_runtime=None,
+                 cwd=None, on_result=None):
+        self.workers = workers
+        self.timeout = timeout            # Queued to started
+        self.max_runtime = max_runtime    # Started to killed; None never kills
+        self.cwd = cwd
+        # on_result(name, status, launch_ms) is called from a pool thread
+        self.on_result = on_result
+        self.jobs = queue.Queue(max_pending)
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._helpers = []
+        self._running = False
+
+    def start(self):
+        """Spawn the helpers now so the first gesture does not wait for them."""
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            helper = _Helper(self.cwd)
+            helper.spawn()
+            thread = threading.Thread(target=self._run, args=(helper,),
+                                      name=f"Launcher-{i}", daemon=True)
+            self._helpers.append(helper)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        self._running = False
+        for _ in self._threads:
+            try:
+                self.jobs.put_nowait(None)
+            except queue.Full:
+                break
+        for helper in self._helpers:
+            helper.kill()
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
+        self._helpers = []
+
+    def run(self, name, spec):
+        """Queue an action without blocking; returns False if the pool is saturated."""
+        job = dict(spec)
+        job.setdefault("timeout", self.timeout)
+        job.setdefault("max_runtime", self.max_runtime)
+        try:
+            self.jobs.put_nowait((name, job, time.perf_counter()))
+            return True
+        except queue.Full:
+            self._record(name, "rejected")
+            return False
+
+    def stats(self):
+        """Per-action counters and launch latency in milliseconds."""
+        with self._lock:
+            result = {}
+            for name, metric in self.metrics.items():
+                entry = {key: value for key, value in metric.items() if key != "launch"}
+                launch = sorted(metric["launch"])
+                if launch:
+                    entry["launch_mean_ms"] = round(sum(launch) / len(launch), 3)
+                    entry["launch_p99_ms"] = round(launch[min(len(launch) - 1, int(len(launch) * 0.99))], 3)
+                result[name] = entry
+            return result
+
+    def _record(self, name, status, launch_ms=None):
+        with self._lock:
+            metric = self.metrics.setdefault(name, {
+                "runs": 0, "failed": 0, "timeouts": 0, "rejected": 0,
+                "launch": deque(maxlen=LATENCY_SAMPLES)})
+            if status == "rejected":
+                metric["rejected"] += 1
+            else:
+                metric["runs"] += 1
+                if status == "timeout":
+                    metric["timeouts"] += 1
+                elif status != "ok":
+                    metric["failed"] += 1
+            if launch_ms is not None:
+                metric["launch"].append(launch_ms)
+        if self.on_result:
+            self.on_result(name, status, launch_ms)
+
+    def _run(self, helper):
+        while self._running:
+            item = self.jobs.get()
+            if item is None:
+                return
+            name, job, queued = item
+            if not helper.alive():
+                helper.respawn()
+            try:
+                helper.send(job)
+                reply = helper.receive(job["timeout"])
+                launch_ms = (time.perf_counter() - queued) * 1000
+                if reply is None:
+                    if not self._running:
+                        return
+                    print(f"Action '{name}' did not start within {job['timeout']}s")
+                    helper.respawn()
+                    self._record(name, "timeout")
+                    continue
+                if reply[0] != "started":
+                    print(f"Action '{name}' failed to start: {reply[1]}")
+                    self._record(name, "error")
+                    continue
+                if "entry_point" not in job:
+                    # The helper reaps the command (and enforces max_runtime) on its own
+                    self._record(name, "ok", launch_ms)
+                    continue
+                # An entry point holds the helper until it returns; over max_runtime it is replaced
+                max_runtime = job["max_runtime"]
+                reply = helper.receive(max_runtime + 1.0 if max_runtime else None)
+                if not self._running:
+                    return
+                if reply is None:
+                    if max_runtime:
+                        print(f"Action '{name}' killed after {max_runtime}s")
+                    helper.respawn()
+                    status = "timeout" if max_runtime else "error"
+                elif reply[0] == "done":
+                    status = "ok" if not reply[1] else "error"
+                else:
+                    status = reply[0]
+                    if status == "error":
+                        print(f"Action '{name}' failed: {reply[1]}")
+                self._record(name, status, launch_ms)
+            except (OSError, ValueError) as e:
+                print(f"Action '{name}' failed: {e}")
+                helper.respawn()
+                self._record(name, "error")
+
+
+if __name__ == "__main__" and HELPER_FLAG in sys.argv:
+    sys.exit(serve())
@@ -0,0 +1,129 @@
+"""
+ListenerSupervisor
+------------------
+Keeps a single long-lived InputListener running.
+
+A watchdog thread checks the hook thread periodically and builds a fresh
+listener if it died or a callback has been stuck for longer than
+``stall_timeout``. Enabling and disabling gestures never touches the
+listener; that is a flag checked in the callbacks.
+
+With a ``park_factory`` the watchdog also parks the hook whenever
+``should_park()`` says so: the listener is replaced by a click watcher
+(power_saver.py) until ``unpark()`` installs a full listener again.
+"""
+
+import threading
+import time
+
+from power_saver import PowerMeter
+
+
+class ListenerSupervisor:
+    def __init__(self, factory, check_interval=1.0, stall_timeout=2.0, on_restart=None,
+                 park_factory=None, should_park=None):
+        # factory() returns a new, not yet started InputListener
+        self.factory = factory
+        self.check_interval = check_interval
+        self.stall_timeout = stall_timeout
+        self.on_restart = on_restart
+        # park_factory() returns a new, not yet started click watcher
+        self.park_factory = park_factory
+        self.should_park = should_park
+        self.listener = None
+        self.parked = False
+        self.restarts = 0
+        self.meter = PowerMeter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def start(self):
+        """Start the listener and the watchdog."""
+        with self._lock:
+            if self.listener is None:
+                self.listener = self.factory()
+                self.listener.start()
+                self.meter.enter("active", self.listener)
+        if self._watchdog is None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="ListenerWatchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        """Stop the watchdog and the listener."""
+        self._stop.set()
+        if self._watchdog:
+            self._watchdog.join(self.check_interval + 1.0)
+            self._watchdog = None
+        with self._lock:
+            if self.listener:
+                self.listener.stop()
+                self.listener = None
+            self.parked = False
+            self.meter.enter(None, None)
+
+    def restart(self, reason="requested"):
+        """Replace the listener, e.g. after a setting that needs a new hook (unparks)."""
+        with self._lock:
+            old = self.listener
+            self.listener = self.factory()
+            self.listener.start()
+            self.parked = False
+            self.meter.enter("active", self.listener)
+            self.restarts += 1
+        if old:
+            try:
+                old.stop()
+            except Exception:
+                pass
+        if self.on_restart:
+            self.on_restart(reason)
+
+    def park(self):
+        """Swap the listener for a click watcher."""
+        with self._lock:
+            if self.parked or self.listener is None or self.park_factory is None:
+                return
+            old = self.listener
+            self.listener = self.park_factory()
+            self.listener.start()
+            self.parked = True
+            self.meter.enter("parked", self.listener)
+        old.stop()
+
+    def unpark(self):
+        """Install a full listener again; it takes over the watcher's button state."""
+        with self._lock:
+            if not self.parked:
+                return
+            watcher = self.listener
+            listener = self.factory()
+            listener.start()
+            self.listener = listener
+            self.parked = False
+            self.meter.enter("active", listener)
+            # Presses seen while the hook was being installed are still counted
+            listener.resume(watcher.pressed, watcher.first_press_time,
+                            watcher.last_press_time, watcher.position)
+        watcher.stop()
+
+    def check(self):
+        """Return why the listener needs a restart, or None if it is healthy."""
+        listener = self.listener
+        if listener is None:
+            return None
+        if not listener.is_alive():
+            return "dead"
+        busy_since = listener.busy_since
+        if busy_since and time.perf_counter() - busy_since > self.stall_timeout:
+            return "stalled"
+        return None
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            reason = self.check()
+            if reason:
+                self.restart(reason)
+            elif self.should_park and not self.parked and self.should_park():
+                self.park()
@@ -5,11 +5,12 @@ Combines the GUI and system tray functionality for the Mouse Gesture Control app
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, simpledialog
 import threading
 import sys
 import os
 import json
+import time
 from typing import Dict, Any
 
 # Add the src directory to the path so we can import our modules
@@ -17,27 +18,102 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gesture_controller import GestureController
 from input_listener import InputListener
-from actions import perform_action
+from listener_supervisor import ListenerSupervisor
+from actions import perform_action, set_backend as set_action_backend, ACTIONS
+from event_log import EventLog
+from gesture_stats import GestureStats
+from gesture_templates import TemplateSet, MIN_SAMPLES, path_length
+from control import ControlServer, AlreadyRunningError, send_command
+from launcher import LauncherPool, HELPER_FLAG, serve as serve_launcher
+from hook_process import HookClient, HOOK_FLAG, main as hook_main
+from ui_bus import UIBus
+from power_saver import click_watcher
+from gesture_feed import GestureFeed
+from scroll_stepper import ScrollStepper, MIN_NOTCHES
+from metrics_shm import MetricsSegment, CHORDS, SUPPRESSED, REJECTED
 import pystray
 from PIL import Image, ImageDraw
 
+DIRECTIONS = ("up", "down", "left", "right")
+SCROLL_GESTURES = ("scroll_up", "scroll_down")
+MAX_SAMPLES = 10
+
 
 class MouseGestureControlApp:
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Mouse Gesture Control")
-        self.root.geometry("500x600")
+        self.root.geometry("500x780")
         self.root.resizable(True, True)
+        # Widget updates from other threads go through the bus, never to Tk directly
+        self.ui_bus = UIBus(self.root)
         
         # Configuration
-        self.config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config_path = os.path.join(self.base_dir, "config.json")
         self.config = self.load_config()
         
         # Gesture control state
+        self.event_log = None
         self.gesture_controller = None
-        self.input_listener = None
+        self.listener_supervisor = None
+        self.active_hook_settings = None
         self.gestures_enabled = False
-        self.background_thread = None
+        self.last_toggle_us = 0.0
+        # Last chord or wake-up, for parking the hook when idle (power_saver.py)
+        self.last_activity = time.monotonic()
+        self.launcher = None
+        self.scroll_stepper = None
+        self.action_backend = None
+        self.gesture_feed = None
+        self.fired_count = 0
+        
+        # Custom gestures learned from demonstrations
+        self.templates = TemplateSet(os.path.join(self.base_dir, "gestures.npz"),
+                                     matcher=self.config.get("template_matcher", "mean"))
+        try:
+            self.templates.load()
+        except Exception as e:
+            print(f"Error loading custom gestures: {e}")
+        self.recorded_samples = None
+        self.recording_path = None
+        
+        # Gesture attempt statistics, kept for the lifetime of the app
+        self.gesture_stats = GestureStats(os.path.join(self.base_dir, "gesture_stats.db"))
+        self.gesture_stats.start()
+        
+        # Local command channel (gesturectl.py); also the single-instance lock
+        self.control_server = ControlServer({
+            "enable": lambda: self.call_in_gui(self.set_gestures_enabled, True),
+            "disable": lambda: self.call_in_gui(self.set_gestures_enabled, False),
+            "reload": lambda: self.call_in_gui(self.reload_config),
+            "show": lambda: self.call_in_gui(self.show_window),
+            "stats": self.control_stats,
+        })
+        try:
+            self.control_server.start()
+        except AlreadyRunningError:
+            # Another launch won the race past the is_running() check; hand over to it
+            try:
+                send_command("show")
+            except (OSError, ValueError):
+                pass
+            print("Mouse Gesture Control is already running.")
+            self.gesture_stats.stop()
+            self.root.destroy()
+            sys.exit(0)
+        except OSError as e:
+            print(f"Cannot open the control channel: {e}")
+            self.gesture_stats.stop()
+            self.root.destroy()
+            sys.exit(1)
+        
+        # Shared memory metrics for external monitors (metrics_shm.py)
+        self.metrics = None
+        try:
+            self.metrics = MetricsSegment().create()
+        except (OSError, ValueError) as e:
+            print(f"Shared memory metrics unavailable: {e}")
         
         # Tray icon
         self.tray_icon = None
@@ -46,6 +122,7 @@ class MouseGestureControlApp:
         # Create GUI elements
         self.create_widgets()
         self.update_ui_from_config()
+        self.refresh_stats()
         
         # Create tray icon
         self.create_tray_icon()
@@ -71,7 +148,24 @@ class MouseGestureControlApp:
             "debug": False,
             "threshold": 120.0,
             "cooldown": 0.5,
-            "use_alt_instead_of_ctrl": True
+            "use_alt_instead_of_ctrl": True,
+            "action_backend": "auto",
+            "chord_buttons": ["left", "right"],
+            "chord_modifier": None,
+            "chord_window": 0.3,
+            "defer_clicks": False,
+            "click_hold_ms": 40,
+            "hook_process": False,
+            "power_saving": False,
+            "park_after": 60.0,
+            "gesture_feed": False,
+            "template_matcher": "mean",
+            "recognize_on_release": False,
+            "command_workers": 2,
+            "scroll_up": "desktop_left",
+            "scroll_down": "desktop_right",
+            "scroll_notches_per_step": 1.0,
+            "scroll_max_rate": 8.0
         }
     
     def save_config(self):
@@ -128,24 +222,21 @@ class MouseGestureControlApp:
                                        command=self.toggle_gestures)
         self.toggle_button.grid(row=0, column=1, padx=(10, 0))
         
+        self.last_gesture_label = ttk.Label(status_frame, text="Last gesture: -")
+        self.last_gesture_label.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
         # Gesture mappings section
         mappings_frame = ttk.LabelFrame(main_frame, text="Gesture Mappings", padding="10")
         mappings_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         mappings_frame.columnconfigure(1, weight=1)
+        self.mappings_frame = mappings_frame
         
-        # Direction mappings
-        directions = ["up", "down", "left", "right"]
+        # Direction mappings, followed by any recorded custom gestures
         self.direction_vars = {}
+        self.action_combos = []
         
-        for i, direction in enumerate(directions):
-            ttk.Label(mappings_frame, text=f"{direction.capitalize()}:").grid(
-                row=i, column=0, sticky=tk.W, pady=2)
-            
-            var = tk.StringVar()
-            self.direction_vars[direction] = var
-            combo = ttk.Combobox(mappings_frame, textvariable=var, width=20, state="readonly")
-            combo['values'] = ("task_view", "close_task_view", "desktop_left", "desktop_right")
-            combo.grid(row=i, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=2)
+        for direction in DIRECTIONS + SCROLL_GESTURES + tuple(self.templates.names):
+            self.add_mapping_row(direction)
         
         # Settings section
         settings_frame = ttk.LabelFrame(main_frame, text="Settings", padding="10")
@@ -186,9 +277,23 @@ class MouseGestureControlApp:
         threshold_scale.configure(command=self.update_threshold_label)
         cooldown_scale.configure(command=self.update_cooldown_label)
         
+        # Statistics section
+        stats_frame = ttk.LabelFrame(main_frame, text="Statistics", padding="10")
+        stats_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        stats_frame.columnconfigure(0, weight=1)
+        
+        self.stats_attempts_label = ttk.Label(stats_frame, text="Attempts: 0")
+        self.stats_attempts_label.grid(row=0, column=0, sticky=tk.W)
+        self.stats_latency_label = ttk.Label(stats_frame, text="Avg latency: -")
+        self.stats_latency_label.grid(row=1, column=0, sticky=tk.W)
+        self.stats_top_label = ttk.Label(stats_frame, text="Top gestures: -")
+        self.stats_top_label.grid(row=2, column=0, sticky=tk.W)
+        ttk.Button(stats_frame, text="Refresh", 
+                  command=self.refresh_stats).grid(row=0, column=1, rowspan=3, padx=(10, 0))
+        
         # Buttons section
         buttons_frame = ttk.Frame(main_frame)
-        buttons_frame.grid(row=4, column=0, columnspan=2, pady=(10, 0))
+        buttons_frame.grid(row=5, column=0, columnspan=2, pady=(10, 0))
         
         ttk.Button(buttons_frame, text="Save Settings", 
                   command=self.save_settings).pack(side=tk.LEFT, padx=(0, 5))
@@ -196,6 +301,98 @@ class MouseGestureControlApp:
                   command=self.reset_defaults).pack(side=tk.LEFT, padx=5)
         ttk.Button(buttons_frame, text="Hide to Tray", 
                   command=self.hide_to_tray).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons_frame, text="Record Gesture", 
+                  command=self.record_gesture).pack(side=tk.LEFT, padx=5)
+    
+    def add_mapping_row(self, gesture):
+        """Add a gesture-to-action row to the mappings section."""
+        row = len(self.direction_vars)
+        ttk.Label(self.mappings_frame, text=f"{gesture.replace('_', ' ').capitalize()}:").grid(
+            row=row, column=0, sticky=tk.W, pady=2)
+        
+        var = tk.StringVar()
+        self.direction_vars[gesture] = var
+        combo = ttk.Combobox(self.mappings_frame, textvariable=var, width=20, state="readonly")
+        combo['values'] = self.action_choices()
+        self.action_combos.append(combo)
+        combo.grid(row=row, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=2)
+        return var
+    
+    def action_choices(self):
+        """Built-in actions followed by the command actions from the config."""
+        return ACTIONS + tuple(self.config.get("commands", {}))
+    
+    def mapping_for(self, gesture):
+        """Return the action mapped to a direction, scroll step or custom gesture."""
+        if gesture in DIRECTIONS or gesture in SCROLL_GESTURES:
+            return self.config.get(gesture)
+        return self.config.get("custom_gestures", {}).get(gesture)
+    
+    def set_mapping(self, gesture, action):
+        """Map a direction, scroll step or custom gesture to an action."""
+        if gesture in DIRECTIONS or gesture in SCROLL_GESTURES:
+            self.config[gesture] = action
+        else:
+            self.config.setdefault("custom_gestures", {})[gesture] = action
+    
+    def record_gesture(self):
+        """Record a new custom gesture from several demonstrations."""
+        name = simpledialog.askstring("Record Gesture", "Name for the new gesture:", parent=self.root)
+        if not name or not name.strip():
+            return
+        name = name.strip().lower()
+        if name in DIRECTIONS or name in SCROLL_GESTURES:
+            messagebox.showerror("Error", f"'{name}' is a built-in gesture.")
+            return
+        
+        if self.listener_supervisor is None:
+            self.enable_gestures()
+        self.recorded_samples = []
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Record Gesture")
+        dialog.transient(self.root)
+        ttk.Label(dialog, padding="10",
+                  text=f"Hold both mouse buttons and draw '{name}'.\n"
+                       f"Repeat {MIN_SAMPLES}-{MAX_SAMPLES} times, then click Finish.").pack()
+        count_label = ttk.Label(dialog, text="Samples: 0")
+        count_label.pack()
+        
+        def update_count():
+            if self.recorded_samples is not None and dialog.winfo_exists():
+                count_label.config(text=f"Samples: {len(self.recorded_samples)}")
+                dialog.after(100, update_count)
+        
+        def finish():
+            samples, self.recorded_samples = self.recorded_samples, None
+            try:
+                self.templates.add(name, samples)
+                self.templates.save()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e), parent=dialog)
+                self.recorded_samples = samples
+                return
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save gesture: {e}", parent=dialog)
+                return
+            
+            if name not in self.direction_vars:
+                self.add_mapping_row(name)
+                self.set_mapping(name, "")
+            if self.gesture_controller:
+                self.gesture_controller.templates = self.templates
+            dialog.destroy()
+        
+        def cancel():
+            self.recorded_samples = None
+            dialog.destroy()
+        
+        buttons = ttk.Frame(dialog, padding="10")
+        buttons.pack()
+        ttk.Button(buttons, text="Finish", command=finish).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Cancel", command=cancel).pack(side=tk.LEFT, padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+        update_count()
     
     def create_tray_icon(self):
         """Create the system tray icon."""
@@ -211,11 +408,11 @@ class MouseGestureControlApp:
         
         # Create menu
         menu = pystray.Menu(
-            pystray.MenuItem("Show Settings", self.show_window),
-            pystray.MenuItem("Enable Gestures", self.toggle_gestures, 
+            pystray.MenuItem("Show Settings", self.from_tray(self.show_window)),
+            pystray.MenuItem("Enable Gestures", self.from_tray(self.toggle_gestures), 
                            checked=lambda item: self.gestures_enabled),
             pystray.Menu.SEPARATOR,
-            pystray.MenuItem("Exit", self.quit_app)
+            pystray.MenuItem("Exit", self.from_tray(self.quit_app))
         )
         
         self.tray_icon = pystray.Icon("MouseGestureControl", image, "Mouse Gesture Control", menu)
@@ -224,6 +421,10 @@ class MouseGestureControlApp:
         self.tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
         self.tray_thread.start()
     
+    def from_tray(self, func):
+        """Wrap a tray menu action so it runs on the Tk main loop, not the tray thread."""
+        return lambda icon, item: self.ui_bus.call(func)
+    
     def show_window(self, icon=None, item=None):
         """Show the main window."""
         self.root.deiconify()
@@ -242,11 +443,25 @@ class MouseGestureControlApp:
         """Update cooldown label when scale changes."""
         self.cooldown_label.config(text=f"{float(value):.2f}")
     
+    def refresh_stats(self):
+        """Update the statistics view from the gesture stats database."""
+        summary = self.gesture_stats.summary()
+        self.stats_attempts_label.config(
+            text=f"Attempts: {summary['total']}    Misfire rate: {summary['misfire_rate'] * 100:.1f}%")
+        if summary["counts"]["fired"]:
+            self.stats_latency_label.config(text=f"Avg latency: {summary['avg_latency_ms']:.1f} ms")
+        else:
+            self.stats_latency_label.config(text="Avg latency: -")
+        top = ", ".join(f"{direction} ({count})" for direction, count in summary["top_gestures"])
+        self.stats_top_label.config(text=f"Top gestures: {top or '-'}")
+    
     def update_ui_from_config(self):
         """Update UI elements from current configuration."""
         # Update direction mappings
+        for combo in self.action_combos:
+            combo['values'] = self.action_choices()
         for direction, var in self.direction_vars.items():
-            var.set(self.config.get(direction, ""))
+            var.set(self.mapping_for(direction) or "")
         
         # Update settings
         self.threshold_var.set(self.config.get("threshold", 120.0))
@@ -265,82 +480,345 @@ class MouseGestureControlApp:
         else:
             self.enable_gestures()
     
+    def call_in_gui(self, func, *args):
+        """Schedule ``func`` on the Tk main loop (used by control channel handlers)."""
+        self.ui_bus.call(func, *args)
+    
+    def set_gestures_enabled(self, enabled):
+        """Enable or disable gesture detection if not already in that state."""
+        if enabled != self.gestures_enabled:
+            self.toggle_gestures()
+    
+    def reload_config(self):
+        """Reload config.json from disk and apply it."""
+        self.config = self.load_config()
+        self.update_ui_from_config()
+        self.apply_config()
+    
+    def control_stats(self):
+        """Reply to the control channel ``stats`` command."""
+        summary = self.gesture_stats.summary()
+        summary["enabled"] = self.gestures_enabled
+        summary["toggle_us"] = round(self.last_toggle_us, 2)
+        summary["ui"] = self.ui_bus.stats()
+        if self.listener_supervisor:
+            summary["listener_restarts"] = self.listener_supervisor.restarts
+        if self.input_listener and self.input_listener.click_delay_stats():
+            summary["click_delay"] = self.input_listener.click_delay_stats()
+        if self.launcher:
+            summary["commands"] = self.launcher.stats()
+        if self.scroll_stepper:
+            summary["scroll"] = self.scroll_stepper.stats()
+        if self.listener_supervisor:
+            summary["power"] = self.listener_supervisor.meter.stats()
+        if self.gesture_feed:
+            summary["feed"] = self.gesture_feed.stats()
+        return summary
+    
+    @property
+    def input_listener(self):
+        """The currently running input listener, if any."""
+        return self.listener_supervisor.listener if self.listener_supervisor else None
+    
+    def create_input_listener(self):
+        """Build an input listener from the current config (used by the supervisor)."""
+        listener_class = HookClient if self.config.get("hook_process", False) else InputListener
+        return listener_class(
+            on_both_press=self.on_both_press,
+            on_move=self.on_move,
+            on_release=self.on_release,
+            chord=self.config.get("chord_buttons", ["left", "right"]),
+            modifier=self.config.get("chord_modifier"),
+            window=self.config.get("chord_window", 0.3),
+            hold=self.config.get("click_hold_ms", 40) / 1000
+            if self.config.get("defer_clicks", False) else None,
+            on_scroll=self.on_scroll
+        )
+    
+    def create_click_watcher(self):
+        """Build the click watcher that stands in for a parked listener."""
+        return click_watcher(self.on_parked_press,
+                             chord=self.config.get("chord_buttons", ["left", "right"]))
+    
+    def should_park(self):
+        """Whether the hook can be parked (asked by the listener watchdog every second)."""
+        if not self.config.get("power_saving", False) or self.config.get("hook_process", False):
+            return False
+        # The click watcher neither holds back chord presses nor sees the keyboard
+        if self.config.get("defer_clicks", False) or self.config.get("chord_modifier"):
+            return False
+        if self.recorded_samples is not None or (self.input_listener and self.input_listener.active):
+            return False
+        return (not self.gestures_enabled
+                or time.monotonic() - self.last_activity > self.config.get("park_after", 60.0))
+    
+    def on_parked_press(self):
+        """A chord button went down while the hook was parked (click watcher thread)."""
+        if not self.gestures_enabled and self.recorded_samples is None:
+            return False
+        self.last_activity = time.monotonic()
+        # Installing the hook takes a few milliseconds; keep the watcher responsive
+        threading.Thread(target=self.listener_supervisor.unpark, name="HookWake", daemon=True).start()
+        return True
+    
+    def hook_settings(self):
+        """Settings that can only be changed by installing a new hook."""
+        return (self.config.get("chord_modifier"),
+                self.config.get("defer_clicks", False),
+                self.config.get("click_hold_ms", 40),
+                self.config.get("hook_process", False))
+    
+    def start_pipeline(self):
+        """Create the gesture controller and the long-lived, supervised listener."""
+        self.gesture_controller = GestureController(
+            threshold=self.config.get("threshold", 120.0),
+            cooldown=self.config.get("cooldown", 0.5),
+            templates=self.templates,
+            recognize_on_release=self.config.get("recognize_on_release", False)
+        )
+        self.scroll_stepper = ScrollStepper(self.on_scroll_step)
+        self.scroll_stepper.start()
+        self.active_hook_settings = self.hook_settings()
+        self.listener_supervisor = ListenerSupervisor(
+            self.create_input_listener, on_restart=self.on_listener_restart,
+            park_factory=self.create_click_watcher, should_park=self.should_park)
+        self.apply_config()
+        self.listener_supervisor.start()
+    
+    def stop_pipeline(self):
+        """Stop the listener and the event log when the application exits."""
+        self.gestures_enabled = False
+        if self.listener_supervisor:
+            try:
+                self.listener_supervisor.stop()
+            except:
+                pass
+            self.listener_supervisor = None
+        if self.scroll_stepper:
+            self.scroll_stepper.stop()
+            self.scroll_stepper = None
+        if self.launcher:
+            self.launcher.stop()
+            self.launcher = None
+        if self.gesture_feed:
+            self.gesture_feed.stop()
+            self.gesture_feed = None
+        if self.event_log:
+            self.event_log.stop()
+            self.event_log = None
+    
+    def apply_config(self):
+        """Apply the current config to the running pipeline without restarting the hook."""
+        if self.listener_supervisor is None:
+            return
+        
+        # Structured event log replaces the old blocking debug prints
+        debug = self.config.get("debug", False)
+        if debug and not self.event_log:
+            self.event_log = EventLog(os.path.join(self.base_dir, "logs"), echo=True)
+            self.event_log.start()
+        elif not debug and self.event_log:
+            self.event_log.stop()
+            self.event_log = None
+        
+        controller = self.gesture_controller
+        controller.threshold = self.config.get("threshold", 120.0)
+        controller.cooldown = self.config.get("cooldown", 0.5)
+        controller.event_log = self.event_log
+        controller.recognize_on_release = self.config.get("recognize_on_release", False)
+        self.templates.matcher = self.config.get("template_matcher", "mean")
+        self.scroll_stepper.notches = max(self.config.get("scroll_notches_per_step", 1.0), MIN_NOTCHES)
+        self.scroll_stepper.max_rate = self.config.get("scroll_max_rate", 8.0)
+        
+        # Desktop actions through the window manager where supported (Linux)
+        backend = self.config.get("action_backend", "auto")
+        if backend != self.action_backend:
+            self.action_backend = backend
+            set_action_backend(backend)
+        
+        # Command actions: helpers are spawned ahead of the first gesture
+        workers = self.config.get("command_workers", 2)
+        if self.launcher and (not self.config.get("commands") or self.launcher.workers != workers):
+            self.launcher.stop()
+            self.launcher = None
+        if self.config.get("commands") and not self.launcher:
+            self.launcher = LauncherPool(workers=workers, cwd=self.base_dir,
+                                         on_result=self.on_command_result)
+            self.launcher.start()
+        
+        # Gesture feed for other programs (gesture_feed.py)
+        feed = self.config.get("gesture_feed", False)
+        if self.gesture_feed and not feed:
+            self.gesture_feed.stop()
+            self.gesture_feed = None
+        elif feed and not self.gesture_feed:
+            try:
+                self.gesture_feed = GestureFeed()
+                self.gesture_feed.start()
+            except OSError as e:
+                print(f"Gesture feed unavailable: {e}")
+                self.gesture_feed = None
+        
+        if self.hook_settings() != self.active_hook_settings:
+            self.active_hook_settings = self.hook_settings()
+            self.listener_supervisor.restart("settings changed")
+        elif self.input_listener:
+            self.input_listener.configure(
+                chord=self.config.get("chord_buttons", ["left", "right"]),
+                window=self.config.get("chord_window", 0.3)
+            )
+        if self.listener_supervisor.parked and not self.config.get("power_saving", False):
+            self.listener_supervisor.unpark()
+    
+    def on_listener_restart(self, reason):
+        """Called by the supervisor after it replaced the input listener."""
+        print(f"Input listener restarted ({reason})")
+        if self.event_log:
+            self.event_log.log("listener_restart", reason=reason)
+    
     def enable_gestures(self):
         """Enable gesture detection."""
         try:
-            # Create gesture controller
-            self.gesture_controller = GestureController(
-                threshold=self.config.get("threshold", 120.0),
-                cooldown=self.config.get("cooldown", 0.5)
-            )
-            
-            # Create input listener
-            self.input_listener = InputListener(
-                on_both_press=self.on_both_press,
-                on_move=self.on_move,
-                on_release=self.on_release
-            )
-            
-            # Start listening in background thread
-            self.background_thread = threading.Thread(target=self.start_listening, daemon=True)
-            self.background_thread.start()
-            
-            self.gestures_enabled = True
-            self.status_label.config(text="Gestures: Enabled", foreground="green")
-            self.toggle_button.config(text="Disable Gestures")
-            
+            if self.listener_supervisor is None:
+                self.start_pipeline()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to enable gestures: {e}")
+            return
+        
+        # Enabling is only a gate flag checked by the input callbacks
+        started = time.perf_counter()
+        self.gestures_enabled = True
+        self.record_toggle(started)
+        
+        self.ui_bus.configure(self.status_label, text="Gestures: Enabled", foreground="green")
+        self.ui_bus.configure(self.toggle_button, text="Disable Gestures")
     
     def disable_gestures(self):
         """Disable gesture detection."""
-        if self.input_listener:
-            try:
-                self.input_listener.listener.stop()
-            except:
-                pass
-        
+        started = time.perf_counter()
         self.gestures_enabled = False
-        self.status_label.config(text="Gestures: Disabled", foreground="red")
-        self.toggle_button.config(text="Enable Gestures")
+        if self.gesture_controller:
+            self.gesture_controller.end_gesture()
+        self.record_toggle(started)
+        
+        self.ui_bus.configure(self.status_label, text="Gestures: Disabled", foreground="red")
+        self.ui_bus.configure(self.toggle_button, text="Enable Gestures")
     
-    def start_listening(self):
-        """Start the input listener."""
-        if self.input_listener:
-            self.input_listener.start()
+    def record_toggle(self, started):
+        """Measure how long flipping the gesture gate took."""
+        self.last_toggle_us = (time.perf_counter() - started) * 1e6
+        if self.metrics:
+            self.metrics.set_enabled(self.gestures_enabled)
+        if self.event_log:
+            self.event_log.log("toggle", enabled=self.gestures_enabled,
+                               toggle_us=round(self.last_toggle_us, 2))
     
     def on_both_press(self, x, y):
         """Handle both mouse buttons pressed."""
-        if self.gesture_controller:
+        self.last_activity = time.monotonic()
+        if self.metrics:
+            self.metrics.add(CHORDS, flush_events=True)
+        if self.event_log:
+            self.event_log.log("chord", gap_ms=round(self.input_listener.chord_gap * 1000, 2),
+                               detect_us=round(self.input_listener.detect_latency * 1e6, 2))
+        if self.recorded_samples is not None:
+            self.recording_path = [(x, y)]
+        elif self.gestures_enabled and self.gesture_controller:
+            self.scroll_stepper.reset()
             self.gesture_controller.start_gesture(x, y)
     
     def on_move(self, x, y):
         """Handle mouse movement during gesture."""
+        if self.metrics:
+            self.metrics.count_event()
+        if self.recording_path is not None:
+            self.recording_path.append((x, y))
+            return
         if not self.gesture_controller:
             return
             
         direction = self.gesture_controller.detect_direction(x, y)
         if direction:
-            action = self.config.get(direction)
-            if action:
-                perform_action(
-                    action,
-                    debug=self.config.get("debug", False),
-                    direction=direction,
-                    use_alt=self.config.get("use_alt_instead_of_ctrl", True)
-                )
+            self.dispatch(direction)
             self.gesture_controller.end_gesture()
     
+    def on_scroll(self, dy):
+        """Handle wheel input while the chord is held."""
+        if not self.gestures_enabled or self.recording_path is not None:
+            return
+        # The chord is now a scroll chord; moving afterwards does not swipe
+        self.gesture_controller.end_gesture()
+        self.scroll_stepper.add(dy)
+    
+    def on_scroll_step(self, direction):
+        """Perform one coalesced, rate-limited scroll step (stepper thread)."""
+        self.dispatch("scroll_up" if direction > 0 else "scroll_down")
+    
     def on_release(self):
         """Handle mouse button release."""
-        if self.gesture_controller:
-            self.gesture_controller.end_gesture()
+        if self.recording_path is not None:
+            samples = self.recorded_samples
+            if samples is not None and len(samples) < MAX_SAMPLES and path_length(self.recording_path) >= 20:
+                samples.append(self.recording_path)
+            self.recording_path = None
+            return
+        
+        controller = self.gesture_controller
+        if controller:
+            if controller.active:
+                gesture = controller.finish_gesture()
+                if gesture:
+                    self.dispatch(gesture)
+                else:
+                    summary = controller.attempt_summary()
+                    self.gesture_stats.record(*summary)
+                    if self.metrics:
+                        self.metrics.add(SUPPRESSED if summary[0] == "suppressed" else REJECTED,
+                                         flush_events=True)
+            controller.end_gesture()
+    
+    def on_command_result(self, name, status, launch_ms):
+        """Called by the launcher when a command action finished or was rejected."""
+        if self.event_log:
+            self.event_log.log("command", action=name, status=status,
+                               launch_ms=round(launch_ms, 3) if launch_ms is not None else None)
+    
+    def dispatch(self, gesture):
+        """Perform the action mapped to a recognized gesture and record it."""
+        controller = self.gesture_controller
+        action = self.mapping_for(gesture)
+        latency_ms = None
+        if action:
+            started = time.perf_counter()
+            command = self.config.get("commands", {}).get(action)
+            if command is not None:
+                # Only queued here; a launcher helper starts it
+                if self.launcher:
+                    self.launcher.run(action, command)
+            else:
+                perform_action(
+                    action,
+                    use_alt=self.config.get("use_alt_instead_of_ctrl", True)
+                )
+            latency_ms = (time.perf_counter() - started) * 1000
+            if self.event_log:
+                self.event_log.log("action", direction=gesture, action=action,
+                                   dispatch_ms=round(latency_ms, 3))
+        self.gesture_stats.record("fired", gesture, controller.max_distance,
+                                  time.time() - controller.start_time, latency_ms)
+        if self.metrics:
+            self.metrics.record_dispatch(latency_ms or 0.0)
+        if self.gesture_feed:
+            self.gesture_feed.publish(gesture)
+        self.fired_count += 1
+        self.ui_bus.configure(self.last_gesture_label,
+                              text=f"Last gesture: {gesture} -> {action or '-'}    Fired: {self.fired_count}")
     
     def save_settings(self):
         """Save current settings to configuration."""
         # Update config from UI
         for direction, var in self.direction_vars.items():
-            self.config[direction] = var.get()
+            self.set_mapping(direction, var.get())
         
         self.config["threshold"] = self.threshold_var.get()
         self.config["cooldown"] = self.cooldown_var.get()
@@ -351,10 +829,8 @@ class MouseGestureControlApp:
         if self.save_config():
             messagebox.showinfo("Success", "Settings saved successfully!")
             
-            # Restart gesture detection if enabled
-            if self.gestures_enabled:
-                self.disable_gestures()
-                self.enable_gestures()
+            # Apply to the running listener; no restart needed
+            self.apply_config()
     
     def reset_defaults(self):
         """Reset settings to default values."""
@@ -367,22 +843,49 @@ class MouseGestureControlApp:
                 "debug": False,
                 "threshold": 120.0,
                 "cooldown": 0.5,
-                "use_alt_instead_of_ctrl": True
+                "use_alt_instead_of_ctrl": True,
+                "action_backend": "auto",
+                "chord_buttons": ["left", "right"],
+                "chord_modifier": None,
+                "chord_window": 0.3,
+                "defer_clicks": False,
+                "click_hold_ms": 40,
+                "hook_process": False,
+                "power_saving": False,
+                "park_after": 60.0,
+                "gesture_feed": False,
+                "template_matcher": "mean",
+                "recognize_on_release": False,
+                "command_workers": 2,
+                "scroll_up": "desktop_left",
+                "scroll_down": "desktop_right",
+                "scroll_notches_per_step": 1.0,
+                "scroll_max_rate": 8.0
             }
             self.update_ui_from_config()
     
     def on_closing(self):
         """Handle window closing."""
-        self.disable_gestures()
+        self.stop_pipeline()
+        self.gesture_stats.stop()
+        self.control_server.stop()
+        if self.metrics:
+            self.metrics.close()
         if self.tray_icon:
             self.tray_icon.stop()
+        self.ui_bus.stop()
         self.root.destroy()
     
     def quit_app(self, icon=None, item=None):
         """Quit the application."""
-        self.disable_gestures()
+        self.stop_pipeline()
+        self.gesture_stats.stop()
+        self.control_server.stop()
+        if self.metrics:
+            self.metrics.close()
         if self.tray_icon:
             self.tray_icon.stop()
+        self.ui_bus.stop()
         self.root.quit()
     
     def run(self, start_minimized=False):
@@ -399,6 +902,7 @@ class MouseGestureControlApp:
             print("Starting minimized to system tray...")
         
         # Run the GUI
+        self.ui_bus.start()
         self.root.mainloop()
     
     def auto_detect_startup(self):
@@ -428,6 +932,16 @@ class MouseGestureControlApp:
 
 
 if __name__ == "__main__":
+    # Packaged builds start command launcher helpers and the hook process through the app executable
+    if HELPER_FLAG in sys.argv:
+        sys.exit(serve_launcher())
+    if HOOK_FLAG in sys.argv:
+        sys.exit(hook_main(sys.argv[sys.argv.index(HOOK_FLAG):]))
+    from control import is_running
+    if is_running():
+        send_command("show")
+        print("Mouse Gesture Control is already running.")
+        sys.exit(0)
     app = MouseGestureControlApp()
     # Auto-detect if we should start minimized
     should_minimize = app.auto_detect_startup()
@@ -0,0 +1,251 @@
+"""
+MetricsShm
+----------
+Gesture health metrics published in a shared memory segment.
+
+The running app owns a small, fixed-layout segment of unsigned 64-bit
+integers (native byte order) and updates it in place. External monitors map
+the segment and read it without any IPC round trip to the app. Every update
+is bracketed by a sequence counter (a seqlock): the counter is odd while a
+write is in progress, and a reader retries until it sees the same even value
+before and after copying the segment.
+
+Layout, version 1 (offset = index * 8)::
+
+    0  magic            b"MGMETRIC"
+    1  version          1
+    2  sequence         even when consistent
+    3  pid              of the writer
+    4  started_ns       wall clock, ns since the epoch
+    5  updated_ns
+    6  enabled          1 while gestures are enabled
+    7  events           input callbacks processed, published every 64
+    8  chords
+    9  fired
+    10 suppressed
+    11 rejected
+    12 dispatch_count
+    13 dispatch_total_us
+    14 dispatch_max_us
+    15 dispatch_hist[16] bucket k: latency below 2**k us, the last one is open-ended
+
+Usage::
+
+    python src/metrics_shm.py
+    python src/metrics_shm.py --watch 1 --json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+MAGIC = int.from_bytes(b"MGMETRIC", "little")
+VERSION = 1
+FIELDS = ("magic", "version", "sequence", "pid", "started_ns", "updated_ns", "enabled",
+          "events", "chords", "fired", "suppressed", "rejected",
+          "dispatch_count", "dispatch_total_us", "dispatch_max_us")
+HISTOGRAM_BUCKETS = 16
+EVENT_BATCH = 64   # Input events are published in batches to keep the hook path cheap
+SIZE = (len(FIELDS) + HISTOGRAM_BUCKETS) * 8
+
+SEQUENCE = FIELDS.index("sequence")
+UPDATED = FIELDS.index("updated_ns")
+ENABLED = FIELDS.index("enabled")
+EVENTS = FIELDS.index("events")
+CHORDS = FIELDS.index("chords")
+FIRED = FIELDS.index("fired")
+SUPPRESSED = FIELDS.index("suppressed")
+REJECTED = FIELDS.index("rejected")
+DISPATCH_COUNT = FIELDS.index("dispatch_count")
+DISPATCH_TOTAL = FIELDS.index("dispatch_total_us")
+DISPATCH_MAX = FIELDS.index("dispatch_max_us")
+HISTOGRAM = len(FIELDS)
+
+
+def segment_name():
+    if hasattr(os, "getuid"):
+        return f"mousegesturecontrol-metrics-{os.getuid()}"
+    return "mousegesturecontrol-metrics"
+
+
+class MetricsSegment:
+    """Writer side, owned by the running app."""
+
+    def __init__(self, name=None):
+        self.name = name or segment_name()
+        self.shm = None
+        self.values = None
+        # Events counted but not yet published; owned by the thread calling count_event()
+        self.pending_events = 0
+        # Writers on different threads (hook, scroll stepper) must not interleave
+        self._lock = threading.Lock()
+
+    def create(self):
+        try:
+            self.shm = shared_memory.SharedMemory(self.name, create=True, size=SIZE)
+        except FileExistsError:
+            # Left behind by a crashed instance; the control socket guarantees we are alone
+            stale = shared_memory.SharedMemory(self.name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(self.name, create=True, size=SIZE)
+        self.values = self.shm.buf[:SIZE].cast("Q")
+        values = self.values
+        for i in range(len(values)):
+            values[i] = 0
+        values[FIELDS.index("version")] = VERSION
+        values[FIELDS.index("pid")] = os.getpid()
+        values[FIELDS.index("started_ns")] = values[UPDATED] = time.time_ns()
+        values[0] = MAGIC   # Last, so readers never see a valid magic on a half-initialized segment
+        return self
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.values.release()
+        self.values = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+    def count_event(self):
+        """Count one input callback (hot path: usually just a local increment)."""
+        self.pending_events += 1
+        if self.pending_events >= EVENT_BATCH:
+            self.add(EVENTS, 0, flush_events=True)
+
+    def add(self, field, count=1, flush_events=False):
+        """Increment one counter in place.
+
+        With ``flush_events`` the pending input events are published too. Only
+        the thread calling count_event() may pass it: the pending count is
+        taken outside the lock, so another thread would lose increments.
+        """
+        events = 0
+        if flush_events:
+            events, self.pending_events = self.pending_events, 0
+        with self._lock:
+            values = self.values
+            values[SEQUENCE] += 1
+            values[field] += count
+            values[EVENTS] += events
+            values[SEQUENCE] += 1
+
+    def set_enabled(self, enabled):
+        with self._lock:
+            values = self.values
+            values[SEQUENCE] += 1
+            values[ENABLED] = 1 if enabled else 0
+            values[UPDATED] = time.time_ns()
+            values[SEQUENCE] += 1
+
+    def record_dispatch(self, latency_ms):
+        """Count a fired gesture and its dispatch latency."""
+        us = int(latency_ms * 1000)
+        bucket = min(us.bit_length(), HISTOGRAM_BUCKETS - 1)
+        with self._lock:
+            values = self.values
+            values[SEQUENCE] += 1
+            values[FIRED] += 1
+            values[DISPATCH_COUNT] += 1
+            values[DISPATCH_TOTAL] += us
+            if us > values[DISPATCH_MAX]:
+                values[DISPATCH_MAX] = us
+            values[HISTOGRAM + bucket] += 1
+            values[UPDATED] = time.time_ns()
+            values[SEQUENCE] += 1
+
+
+def attach(name=None):
+    """Map an existing segment read-only in spirit; never unlinks it on exit."""
+    name = name or segment_name()
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached segments for cleanup; undo that
+        shm = shared_memory.SharedMemory(name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def read(shm, retries=1000):
+    """Return a consistent snapshot as a dict."""
+    values = shm.buf[:SIZE].cast("Q")
+    try:
+        for _ in range(retries):
+            before = values[SEQUENCE]
+            if not before & 1:
+                snapshot = values.tolist()
+                if values[SEQUENCE] == before:
+                    break
+            time.sleep(0)   # Let a preempted writer finish its update
+        else:
+            raise RuntimeError("Writer kept the segment busy")
+    finally:
+        values.release()
+
+    if snapshot[0] != MAGIC:
+        raise ValueError("Not a gesture metrics segment")
+    if snapshot[1] != VERSION:
+        raise ValueError(f"Unsupported metrics layout version {snapshot[1]}")
+    metrics = dict(zip(FIELDS, snapshot))
+    metrics["dispatch_hist"] = snapshot[HISTOGRAM:HISTOGRAM + HISTOGRAM_BUCKETS]
+    del metrics["magic"]
+    return metrics
+
+
+def print_metrics(metrics):
+    count = metrics["dispatch_count"]
+    age = (time.time_ns() - metrics["updated_ns"]) / 1e9
+    print(f"pid {metrics['pid']}  enabled {bool(metrics['enabled'])}  updated {age:.1f}s ago")
+    print(f"events {metrics['events']}  chords {metrics['chords']}  fired {metrics['fired']}"
+          f"  suppressed {metrics['suppressed']}  rejected {metrics['rejected']}")
+    if count:
+        print(f"dispatch mean {metrics['dispatch_total_us'] / count / 1000:.3f} ms"
+              f"  max {metrics['dispatch_max_us'] / 1000:.3f} ms")
+        buckets = [(f"<{2 ** k}us" if k < HISTOGRAM_BUCKETS - 1 else f">={2 ** (k - 1)}us", n)
+                   for k, n in enumerate(metrics["dispatch_hist"]) if n]
+        print("dispatch histogram: " + "  ".join(f"{label} {n}" for label, n in buckets))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read gesture metrics from shared memory.")
+    parser.add_argument("--name", default=None, help="segment name (default: per-user name)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="repeat every SECONDS")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per read")
+    args = parser.parse_args(argv)
+
+    try:
+        shm = attach(args.name)
+    except FileNotFoundError:
+        print("Mouse Gesture Control is not running (no metrics segment).")
+        return 1
+    try:
+        while True:
+            metrics = read(shm)
+            if args.json:
+                print(json.dumps(metrics), flush=True)
+            else:
+                print_metrics(metrics)
+            if not args.watch:
+                return 0
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        shm.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
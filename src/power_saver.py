@@ -0,0 +1,291 @@
+"""
+PowerSaver
+----------
+Parks the input hook while no gesture can happen.
+
+The full listener is woken for every mouse move anywhere on the desktop. While
+gestures are disabled, or no chord was made for ``park_after`` seconds, the
+supervisor swaps it for a click watcher that only follows the buttons. The
+first chord button press wakes the full listener again; it takes over the
+watcher's button state, so the chord that woke it still counts.
+
+On X11 the watcher records only ButtonPress and ButtonRelease through the
+RECORD extension, so mouse moves never reach the process. Elsewhere it is a
+pynput listener without move and wheel callbacks. A Windows low-level hook
+still sees every move; the event filter drops them before pynput decodes them.
+The watcher neither defers clicks nor tracks keyboard modifiers, so the app
+does not park with ``defer_clicks`` or ``chord_modifier`` set.
+
+``PowerMeter`` reports hook wakeups per second and process CPU time for the
+active and parked states.
+
+Usage::
+
+    python src/power_saver.py --measure 10    # full listener vs click watcher, synthetic moves
+"""
+
+import argparse
+import subprocess
+import sys
+import threading
+import time
+
+from pynput import mouse
+
+from input_listener import BUTTON_BITS, InputListener, chord_mask
+
+try:
+    from Xlib import X, display as xdisplay
+    from Xlib.ext import record
+    from Xlib.protocol import rq
+except ImportError:
+    record = None
+
+WM_MOUSEMOVE = 0x0200
+X_BUTTONS = {1: "left", 2: "middle", 3: "right", 8: "x1", 9: "x2"}
+STATES = ("active", "parked")
+
+
+class ClickWatcher:
+    """Button state without moves; calls ``on_wake()`` when a chord button goes down.
+
+    ``on_wake`` returns True if the full listener is coming; until then every
+    chord button press asks again.
+    """
+
+    def __init__(self, on_wake, chord=("left", "right"), clock=time.time):
+        self.on_wake = on_wake
+        self.chord = chord_mask(chord)
+        self.clock = clock
+        self.pressed = 0
+        self.first_press_time = 0.0
+        self.last_press_time = 0.0
+        self.position = (0, 0)
+        self.woken = False
+        self.active = False      # Never inside a chord; the full listener detects those
+        self.busy_since = 0.0    # Callbacks never block (for the watchdog)
+        self.wakeups = 0
+
+    def configure(self, chord=("left", "right"), window=None):
+        self.chord = chord_mask(chord)
+
+    def click_delay_stats(self):
+        return None
+
+    def _click(self, x, y, bit, pressed):
+        if not pressed:
+            self.pressed &= ~bit
+            return
+        now = self.clock()
+        if not self.pressed & self.chord:
+            self.first_press_time = now
+        self.pressed |= bit
+        self.last_press_time = now
+        self.position = (x, y)
+        if bit & self.chord and not self.woken:
+            self.woken = bool(self.on_wake())
+
+
+class XRecordClickWatcher(ClickWatcher):
+    """Click watcher recording only button events from the X server."""
+
+    def __init__(self, on_wake, chord=("left", "right"), clock=time.time):
+        super().__init__(on_wake, chord, clock)
+        self._control = xdisplay.Display()
+        if not self._control.has_extension("RECORD"):
+            self._control.close()
+            raise RuntimeError("The X server has no RECORD extension")
+        self._data = xdisplay.Display()
+        # Event types are a range: ButtonPress..ButtonRelease leaves out MotionNotify
+        self._context = self._data.record_create_context(0, [record.AllClients], [{
+            "core_requests": (0, 0), "core_replies": (0, 0),
+            "ext_requests": (0, 0, 0, 0), "ext_replies": (0, 0, 0, 0),
+            "delivered_events": (0, 0), "device_events": (X.ButtonPress, X.ButtonRelease),
+            "errors": (0, 0), "client_started": False, "client_died": False,
+        }])
+        self._parser = rq.EventField(None)
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="ClickWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._control.record_disable_context(self._context)
+        self._control.flush()
+        if self._thread:
+            self._thread.join(1.0)
+        self._control.close()
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            self._data.record_enable_context(self._context, self._handle)
+        finally:
+            self._data.record_free_context(self._context)
+            self._data.close()
+
+    def _handle(self, reply):
+        if reply.category != record.FromServer or reply.client_swapped or not reply.data:
+            return
+        self.wakeups += 1
+        data = reply.data
+        while data:
+            event, data = self._parser.parse_binary_value(data, self._data.display, None, None)
+            name = X_BUTTONS.get(event.detail)   # Wheel steps are buttons 4-7
+            if name:
+                self._click(event.root_x, event.root_y, BUTTON_BITS[name], event.type == X.ButtonPress)
+
+
+class PynputClickWatcher(ClickWatcher):
+    """Click watcher on a pynput listener with only the click callback."""
+
+    def __init__(self, on_wake, chord=("left", "right"), clock=time.time):
+        super().__init__(on_wake, chord, clock)
+        self.button_bits = {getattr(mouse.Button, name): bit
+                            for name, bit in BUTTON_BITS.items()
+                            if hasattr(mouse.Button, name)}
+        options = {}
+        if sys.platform == "win32":
+            options["win32_event_filter"] = self._win32_filter
+        self.listener = mouse.Listener(on_click=self._on_click, **options)
+
+    def _win32_filter(self, msg, data):
+        # The hook still sees moves; skip them before pynput decodes them
+        if msg == WM_MOUSEMOVE:
+            self.wakeups += 1
+            return False
+        return True
+
+    def _on_click(self, x, y, button, pressed):
+        self.wakeups += 1
+        self._click(x, y, self.button_bits.get(button, 0), pressed)
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+
+    def is_alive(self):
+        return self.listener.is_alive()
+
+
+def click_watcher(on_wake, chord=("left", "right")):
+    """Build the cheapest click watcher this platform offers (not started)."""
+    if record is not None and sys.platform.startswith("linux"):
+        try:
+            return XRecordClickWatcher(on_wake, chord)
+        except Exception as e:
+            print(f"X RECORD click watcher unavailable, using pynput: {e}")
+    return PynputClickWatcher(on_wake, chord)
+
+
+class PowerMeter:
+    """Wall time, process CPU time and hook wakeups per listener state."""
+
+    def __init__(self, clock=time.monotonic, cpu_clock=time.process_time):
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.totals = {state: [0.0, 0.0, 0] for state in STATES}   # seconds, cpu, wakeups
+        self.parks = 0
+        self.state = None
+        self._listener = None
+        self._since = 0.0
+        self._cpu = 0.0
+        self._wakeups = 0
+
+    def enter(self, state, listener):
+        """Account time from now on to ``state``, with wakeups counted by ``listener``; None stops."""
+        self._close()
+        if state == "parked" and self.state == "active":
+            self.parks += 1
+        self.state = state
+        self._listener = listener
+        self._since = self.clock()
+        self._cpu = self.cpu_clock()
+        self._wakeups = getattr(listener, "wakeups", 0)
+
+    def _current(self):
+        if self.state is None:
+            return None
+        return (self.clock() - self._since, self.cpu_clock() - self._cpu,
+                getattr(self._listener, "wakeups", 0) - self._wakeups)
+
+    def _close(self):
+        current = self._current()
+        if current:
+            totals = self.totals[self.state]
+            for i, value in enumerate(current):
+                totals[i] += value
+
+    def stats(self):
+        summary = {"state": self.state, "parks": self.parks}
+        current = self._current()
+        for state, totals in self.totals.items():
+            seconds, cpu, wakeups = totals
+            if current and state == self.state:
+                seconds, cpu, wakeups = seconds + current[0], cpu + current[1], wakeups + current[2]
+            summary[state] = {
+                "seconds": round(seconds, 1),
+                "wakeups_per_s": round(wakeups / seconds, 2) if seconds else None,
+                "cpu_s": round(cpu, 3),
+                "cpu_percent": round(cpu / seconds * 100, 3) if seconds else None,
+            }
+        return summary
+
+
+def inject(rate, seconds):
+    """Move the pointer around a small square at ``rate`` Hz (runs in its own process)."""
+    controller = mouse.Controller()
+    interval = 1.0 / rate
+    deadline = time.perf_counter() + seconds
+    step = 0
+    while time.perf_counter() < deadline:
+        step += 1
+        controller.move(1 if step % 40 < 20 else -1, 1 if (step + 10) % 40 < 20 else -1)
+        time.sleep(interval)
+
+
+def measure(seconds=10.0, rate=250):
+    """Wakeups/s and CPU time of the full listener and the click watcher under synthetic moves."""
+    noop = lambda *args: None
+    meter = PowerMeter()
+    for state, build in (("active", lambda: InputListener(noop, noop, noop, on_scroll=noop)),
+                         ("parked", lambda: click_watcher(lambda: False))):
+        listener = build()
+        listener.start()
+        time.sleep(0.2)   # Hook installed
+        # A separate process, so injecting does not count as our CPU time
+        injector = subprocess.Popen([sys.executable, __file__, "--inject", str(rate), str(seconds)])
+        meter.enter(state, listener)
+        injector.wait()
+        meter.enter(None, None)
+        listener.stop()
+    stats = meter.stats()
+    print(f"{seconds:.0f} s of pointer moves at {rate} Hz per state")
+    for state in STATES:
+        s = stats[state]
+        print(f"{state:6s}  {s['wakeups_per_s']:8.1f} wakeups/s  CPU {s['cpu_s']:.3f} s ({s['cpu_percent']:.2f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hook parking: measure wakeups and CPU time.")
+    parser.add_argument("--measure", type=float, metavar="SECONDS", help="seconds per state")
+    parser.add_argument("--rate", type=int, default=250, help="synthetic moves per second")
+    parser.add_argument("--inject", nargs=2, type=float, metavar=("RATE", "SECONDS"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.inject:
+        inject(*args.inject)
+    elif args.measure:
+        measure(args.measure, args.rate)
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+ScrollStepper
+-------------
+Turns bursts of wheel deltas into discrete, rate-limited steps.
+
+The input hook only adds each wheel delta to an accumulator. A worker thread
+takes one step per ``notches`` of accumulated delta and performs at most
+``max_rate`` steps per second. Delta beyond ``max_pending`` steps is dropped,
+so a free-spinning wheel cannot queue up hundreds of actions that keep firing
+after it stops.
+"""
+
+import threading
+import time
+
+MIN_NOTCHES = 0.1   # Smallest step size; at 0 the worker would step forever
+
+
+class ScrollStepper:
+    def __init__(self, on_step, notches=1.0, max_rate=8.0, max_pending=2, clock=time.perf_counter):
+        # on_step(direction) is called from the worker thread with +1 (up) or -1 (down)
+        if notches <= 0:
+            raise ValueError(f"notches must be positive, got {notches}")
+        self.on_step = on_step
+        self.notches = notches
+        self.max_rate = max_rate
+        self.max_pending = max_pending
+        self.clock = clock
+        self.accumulated = 0.0
+        self.events = 0
+        self.steps = 0
+        self.dropped = 0.0   # Wheel delta discarded by the rate cap, in notches
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="ScrollStepper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def add(self, delta):
+        """Accumulate a wheel delta (called from the input hook)."""
+        with self._cond:
+            self.events += 1
+            value = self.accumulated + delta
+            limit = self.max_pending * self.notches
+            if abs(value) > limit:
+                self.dropped += abs(value) - limit
+                value = limit if value > 0 else -limit
+            self.accumulated = value
+            if abs(value) >= self.notches:
+                self._cond.notify()
+
+    def reset(self):
+        """Forget leftover delta, e.g. when a new chord starts."""
+        with self._cond:
+            self.accumulated = 0.0
+
+    def stats(self):
+        return {"events": self.events, "steps": self.steps,
+                "dropped_notches": round(self.dropped, 2)}
+
+    def _run(self):
+        next_allowed = 0.0
+        while True:
+            with self._cond:
+                while self._running and abs(self.accumulated) < self.notches:
+                    self._cond.wait()
+                # Rate cap: wait out the interval, picking up further delta meanwhile
+                while self._running and self.clock() < next_allowed:
+                    self._cond.wait(next_allowed - self.clock())
+                if not self._running:
+                    return
+                if abs(self.accumulated) < self.notches:
+                    continue   # Reset while waiting
+                direction = 1 if self.accumulated > 0 else -1
+                self.accumulated -= direction * self.notches
+                self.steps += 1
+
+            next_allowed = self.clock() + (1.0 / self.max_rate if self.max_rate else 0.0)
+            try:
+                self.on_step(direction)
+            except Exception as e:
+                print(f"Error performing scroll action: {e}")
@@ -0,0 +1,201 @@
+"""
+Synth
+-----
+Synthetic, human-like chord sessions for load and fuzz testing.
+
+Strokes follow a minimum-jerk speed profile along a cubic Bezier path with
+configurable speed, curvature, overshoot, jitter and polling rate (125 Hz to
+8 kHz). A share of the strokes are misfire-style movements that stop just
+short of the threshold. Everything is generated with vectorized NumPy into
+arrays of ``traces.TRACE_DTYPE``, so batches can be written as trace files,
+streamed lazily or replayed through the listener callbacks.
+
+Usage::
+
+    python src/synth.py corpus/ --traces 1000 --chords 200 --rate 1000
+    python src/synth.py --bench
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from traces import MAGIC, MOVE, PRESS, RELEASE, BUTTONS, TRACE_DTYPE, Event
+
+DTYPE = np.dtype(TRACE_DTYPE)
+LEFT = BUTTONS.index("left")
+RIGHT = BUTTONS.index("right")
+# LABELS index -> unit vector (screen y grows downwards)
+DIRECTION_VECTORS = np.array([(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.float64)
+SCREEN = (1920, 1080)
+
+
+def minimum_jerk(tau):
+    return tau ** 3 * (10 - 15 * tau + 6 * tau * tau)
+
+
+def generate(chords, rate=1000, threshold=120.0, speed=(800.0, 2500.0), jitter=1.0,
+             curvature=0.15, overshoot=0.1, misfire_fraction=0.2, start=0.0, rng=None):
+    """Generate ``chords`` right+left chord strokes as one event array.
+
+    ``speed`` is a (min, max) range in px/s, ``jitter`` the sensor noise in px,
+    ``curvature`` the Bezier control point offset as a fraction of stroke
+    length, ``overshoot`` the largest overshoot fraction past the end point.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    n = chords
+
+    # Per-chord parameters
+    misfire = rng.random(n) < misfire_fraction
+    labels = np.where(misfire, 0, rng.integers(1, 5, n)).astype(np.uint8)
+    angle_noise = rng.normal(0.0, np.radians(10), n)
+    base = DIRECTION_VECTORS[labels]
+    angles = np.where(misfire, rng.uniform(0, 2 * np.pi, n),
+                      np.arctan2(base[:, 1], base[:, 0]) + angle_noise)
+    lengths = threshold * np.where(misfire, rng.uniform(0.6, 0.98, n), rng.uniform(1.2, 2.5, n))
+    durations = np.maximum(lengths / rng.uniform(speed[0], speed[1], n), 0.02)
+    samples = np.maximum(np.ceil(durations * rate).astype(np.int64), 2)
+    press_gaps = rng.uniform(0.0, 0.03, n)
+    idle_gaps = rng.uniform(0.2, 1.5, n)
+    overshoots = rng.uniform(0.0, overshoot, n)
+    origin = rng.uniform((0, 0), SCREEN, (n, 2))
+
+    # Chord timeline: right press, left press, moves at the polling rate, releases
+    dt = 1.0 / rate
+    spans = press_gaps + (samples + 2) * dt
+    starts = start + np.cumsum(idle_gaps) + np.concatenate(([0.0], np.cumsum(spans)[:-1]))
+
+    # Ragged move samples flattened into one array
+    total_moves = int(samples.sum())
+    chord_of_move = np.repeat(np.arange(n), samples)
+    move_offsets = np.concatenate(([0], np.cumsum(samples)[:-1]))
+    k = np.arange(total_moves) - np.repeat(move_offsets, samples) + 1
+    tau = k / samples[chord_of_move]
+
+    # Minimum-jerk progress with an optional overshoot that settles by the end
+    o = overshoots[chord_of_move]
+    u = minimum_jerk(tau) * (1 + o) - o * minimum_jerk(np.clip((tau - 0.7) / 0.3, 0.0, 1.0))
+
+    # Cubic Bezier from origin to end point with perpendicular control offsets
+    direction = np.column_stack((np.cos(angles), np.sin(angles)))
+    normal = np.column_stack((-direction[:, 1], direction[:, 0]))
+    end = direction * lengths[:, None]
+    bend = rng.normal(0.0, curvature, (n, 2)) * lengths[:, None]
+    p1 = end / 3 + normal * bend[:, :1]
+    p2 = end * 2 / 3 + normal * bend[:, 1:]
+    um = 1 - u
+    b1 = (3 * um * um * u)[:, None]
+    b2 = (3 * um * u * u)[:, None]
+    b3 = (u * u * u)[:, None]
+    path = b1 * p1[chord_of_move] + b2 * p2[chord_of_move] + b3 * end[chord_of_move]
+    path += origin[chord_of_move] + rng.normal(0.0, jitter, (total_moves, 2))
+
+    # Assemble the event array
+    per_chord = samples + 4
+    events = np.zeros(int(per_chord.sum()), dtype=DTYPE)
+    chord_offsets = np.concatenate(([0], np.cumsum(per_chord)[:-1]))
+    events["label"] = np.repeat(labels, per_chord)
+
+    second_press = starts + press_gaps
+    release_t = second_press + (samples + 1) * dt
+    end_points = path[np.cumsum(samples) - 1]
+    for offset, t, kind, button, xy in (
+            (0, starts, PRESS, RIGHT, origin),
+            (1, second_press, PRESS, LEFT, origin),
+            (samples + 2, release_t, RELEASE, LEFT, end_points),
+            (samples + 3, release_t, RELEASE, RIGHT, end_points)):
+        idx = chord_offsets + offset
+        events["t"][idx] = t
+        events["kind"][idx] = kind
+        events["button"][idx] = button
+        events["x"][idx] = xy[:, 0]
+        events["y"][idx] = xy[:, 1]
+
+    move_idx = np.repeat(chord_offsets + 2, samples) + k - 1
+    events["t"][move_idx] = second_press[chord_of_move] + k * dt
+    events["kind"][move_idx] = MOVE
+    events["x"][move_idx] = path[:, 0]
+    events["y"][move_idx] = path[:, 1]
+    return events
+
+
+def iter_batches(chords, batch=10_000, seed=None, **options):
+    """Lazily yield event arrays of up to ``batch`` chords on one continuous timeline."""
+    rng = np.random.default_rng(seed)
+    t = 0.0
+    while chords > 0:
+        events = generate(min(batch, chords), start=t, rng=rng, **options)
+        chords -= batch
+        t = float(events["t"][-1])
+        yield events
+
+
+def to_events(events):
+    """Convert an event array to ``traces.Event`` tuples for callback replay."""
+    columns = [events[name].tolist() for name in DTYPE.names]
+    return [Event._make(values) for values in zip(*columns)]
+
+
+def write_trace(path, events):
+    """Write an event array as a trace file."""
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(events.astype(DTYPE, copy=False).tobytes())
+
+
+def write_corpus(directory, traces, chords, seed=None, **options):
+    """Write ``traces`` trace files of ``chords`` synthetic chords each."""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i in range(traces):
+        write_trace(os.path.join(directory, f"synth-{i:05d}.trace"),
+                    generate(chords, rng=rng, **options))
+
+
+def bench(rate=1000):
+    # About ten million events regardless of the polling rate
+    chords = max(1000, 100_000_000 // rate)
+    rng = np.random.default_rng(0)
+    generate(1000, rate=rate, rng=rng)  # Warm up
+    started = time.perf_counter()
+    events = generate(chords, rate=rate, rng=rng)
+    elapsed = time.perf_counter() - started
+    print(f"{len(events):,} events in {elapsed:.3f}s "
+          f"({len(events) / elapsed:,.0f} events/s at {rate} Hz)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic gesture traces.")
+    parser.add_argument("directory", nargs="?", help="output corpus directory")
+    parser.add_argument("--traces", type=int, default=100)
+    parser.add_argument("--chords", type=int, default=100, help="chords per trace")
+    parser.add_argument("--rate", type=int, default=1000, help="polling rate in Hz (125-8000)")
+    parser.add_argument("--threshold", type=float, default=120.0)
+    parser.add_argument("--speed", type=float, nargs=2, default=(800.0, 2500.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--jitter", type=float, default=1.0)
+    parser.add_argument("--curvature", type=float, default=0.15)
+    parser.add_argument("--overshoot", type=float, default=0.1)
+    parser.add_argument("--misfires", type=float, default=0.2, help="fraction of near-threshold strokes")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="measure generation throughput")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        bench(rate=args.rate)
+        return 0
+    if not args.directory:
+        parser.error("directory is required unless --bench is given")
+
+    write_corpus(args.directory, args.traces, args.chords, seed=args.seed, rate=args.rate,
+                 threshold=args.threshold, speed=tuple(args.speed), jitter=args.jitter,
+                 curvature=args.curvature, overshoot=args.overshoot,
+                 misfire_fraction=args.misfires)
+    print(f"Wrote {args.traces} traces to {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
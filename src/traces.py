@@ -0,0 +1,189 @@
+"""
+Traces
+------
+Recorded mouse sessions used for offline tuning and evaluation.
+
+A trace file is an 8-byte header followed by fixed-size little-endian records::
+
+    t       float64   seconds since the start of the recording
+    kind    uint8     MOVE, PRESS or RELEASE
+    button  uint8     BUTTONS index (0 for moves)
+    label   uint8     LABELS index of the intended gesture, UNLABELED if unknown
+    device  uint8     input device id, 0 if unknown or the only device
+    x, y    float32   pointer position
+
+The layout matches ``TRACE_DTYPE`` so files can be memory-mapped with NumPy
+(``numpy.memmap(path, dtype=TRACE_DTYPE, mode="r", offset=HEADER_SIZE)``), while
+reading and writing here only needs the standard library.
+
+Usage::
+
+    python src/traces.py record session.trace --label up
+    python src/traces.py info corpus/
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+MAGIC = b"MGTRACE\x01"
+HEADER_SIZE = len(MAGIC)
+RECORD = struct.Struct("<dBBBBff")
+
+MOVE, PRESS, RELEASE = 0, 1, 2
+BUTTONS = (None, "left", "right", "middle", "x1", "x2")
+LABELS = ("none", "up", "down", "left", "right")
+UNLABELED = 255
+
+# NumPy dtype description equivalent to RECORD (np.dtype(TRACE_DTYPE))
+TRACE_DTYPE = [("t", "<f8"), ("kind", "u1"), ("button", "u1"), ("label", "u1"),
+               ("device", "u1"), ("x", "<f4"), ("y", "<f4")]
+
+Event = namedtuple("Event", "t kind button label device x y")
+
+# One button chord: label of the intended gesture, start position and time,
+# the (t, x, y) moves while held, and the release time.
+Chord = namedtuple("Chord", "label t x y moves end")
+
+
+class TraceWriter:
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(MAGIC)
+
+    def write(self, t, kind, button, x, y, label=UNLABELED, device=0):
+        self._file.write(RECORD.pack(t, kind, button, label, device, x, y))
+
+    def close(self):
+        self._file.close()
+
+
+def read_trace(path):
+    """Return the list of events stored in a trace file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:HEADER_SIZE] != MAGIC:
+        raise ValueError(f"{path} is not a gesture trace file")
+    body = memoryview(data)[HEADER_SIZE:]
+    body = body[:len(body) - len(body) % RECORD.size]
+    return [Event._make(values) for values in RECORD.iter_unpack(body)]
+
+
+def trace_files(path):
+    """Return the trace files in ``path`` (a single file or a corpus directory)."""
+    if os.path.isdir(path):
+        return sorted(os.path.join(root, name)
+                      for root, _, names in os.walk(path)
+                      for name in names if name.endswith(".trace"))
+    return [path]
+
+
+def iter_chords(events, chord=("left", "right")):
+    """Split a session into chords of the given buttons, as InputListener sees them."""
+    chord = frozenset(chord)
+    down = set()
+    current = None
+    for event in events:
+        if event.kind == MOVE:
+            if current is not None:
+                current.moves.append((event.t, event.x, event.y))
+            continue
+
+        pressed = event.kind == PRESS
+        button = BUTTONS[event.button] if event.button < len(BUTTONS) else None
+        if button not in chord:
+            continue
+        was_chord = down == chord
+        if pressed:
+            down.add(button)
+        else:
+            down.discard(button)
+
+        if pressed and not was_chord and down == chord:
+            label = LABELS[event.label] if event.label < len(LABELS) else None
+            current = Chord(label, event.t, event.x, event.y, [], None)
+        elif not pressed and current is not None:
+            yield current._replace(end=event.t)
+            current = None
+
+
+class ReplayClock:
+    """Virtual clock for GestureController; set ``t`` before each call."""
+
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def record(path, label):
+    """Record live mouse input into ``path`` until interrupted."""
+    from pynput import mouse
+
+    label_index = LABELS.index(label) if label else UNLABELED
+    button_index = {getattr(mouse.Button, name): i
+                    for i, name in enumerate(BUTTONS)
+                    if name and hasattr(mouse.Button, name)}
+    writer = TraceWriter(path)
+    start = time.perf_counter()
+
+    def on_move(x, y):
+        writer.write(time.perf_counter() - start, MOVE, 0, x, y, label_index)
+
+    def on_click(x, y, button, pressed):
+        writer.write(time.perf_counter() - start, PRESS if pressed else RELEASE,
+                     button_index.get(button, 0), x, y, label_index)
+
+    print(f"Recording to {path} (label: {label or 'unlabeled'}). Press Ctrl+C to stop.")
+    listener = mouse.Listener(on_move=on_move, on_click=on_click)
+    listener.start()
+    try:
+        while listener.is_alive():
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+        writer.close()
+
+
+def info(path):
+    """Print event and chord counts for a trace file or corpus."""
+    for trace in trace_files(path):
+        events = read_trace(trace)
+        chords = list(iter_chords(events))
+        labels = {}
+        for chord in chords:
+            labels[chord.label] = labels.get(chord.label, 0) + 1
+        duration = events[-1].t - events[0].t if events else 0.0
+        print(f"{trace}: {len(events)} events, {len(chords)} chords, {duration:.1f}s, labels {labels}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and inspect gesture traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record live mouse input")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--label", choices=LABELS,
+                               help="intended gesture for every chord in this recording")
+
+    info_parser = commands.add_parser("info", help="summarize a trace file or corpus")
+    info_parser.add_argument("path")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record(args.path, args.label)
+    else:
+        info(args.path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Tuner
+-----
+Offline search for the ``threshold`` and ``cooldown`` settings.
+
+Replays a corpus of labeled traces (see ``traces.py``) through
+GestureController for every candidate setting, spread across a process pool,
+and reports the settings with the lowest error rate and gesture latency.
+
+The cooldown exists to stop repeat fires: a chord labeled ``none`` that starts
+right after a gesture fired (a bounced button, a hand coming to rest). Such a
+fire counts as a repeat. Without any such chords in the corpus the cooldown
+cannot change the result, so it is left at the configured value. Ties between
+settings go to the one closest to the configured values.
+
+Usage::
+
+    python src/tuner.py corpus/
+    python src/tuner.py corpus/ --config config.json --refine 2 --write-config config.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from gesture_controller import GestureController
+from traces import ReplayClock, iter_chords, read_trace, trace_files
+
+THRESHOLD_RANGE = (50.0, 300.0)   # Same range as the GUI slider
+COOLDOWN_RANGE = (0.1, 2.0)
+REPEAT_WINDOW = COOLDOWN_RANGE[1]   # A "none" chord this soon after a fire is a repeat
+
+_sessions = None
+
+
+def load_sessions(paths, chord=("left", "right")):
+    """Load labeled chords of the ``chord`` buttons from each trace, one list per session."""
+    sessions = []
+    for path in paths:
+        chords = [c for c in iter_chords(read_trace(path), chord) if c.label is not None]
+        if chords:
+            sessions.append(chords)
+    return sessions
+
+
+def repeat_chords(sessions):
+    """Count ``none`` chords starting within REPEAT_WINDOW of the end of a gesture chord."""
+    count = 0
+    for session in sessions:
+        for previous, chord in zip(session, session[1:]):
+            if (chord.label == "none" and previous.label != "none"
+                    and chord.t - previous.end < REPEAT_WINDOW):
+                count += 1
+    return count
+
+
+def evaluate(sessions, threshold, cooldown):
+    """Replay sessions with one setting and return error counts and latency."""
+    chords = misfires = repeats = misses = fired = 0
+    latency_total = 0.0
+    for session in sessions:
+        clock = ReplayClock()
+        controller = GestureController(threshold=threshold, cooldown=cooldown, clock=clock)
+        last_fire = None
+        for chord in session:
+            chords += 1
+            clock.t = chord.t
+            controller.start_gesture(chord.x, chord.y)
+            direction = None
+            for t, x, y in chord.moves:
+                clock.t = t
+                direction = controller.detect_direction(x, y)
+                if direction:
+                    break
+            controller.end_gesture()
+
+            if direction:
+                fired += 1
+                latency_total += clock.t - chord.t
+                if chord.label == "none" and last_fire is not None and chord.t - last_fire < REPEAT_WINDOW:
+                    repeats += 1
+                elif direction != chord.label:
+                    misfires += 1
+                last_fire = clock.t
+            elif chord.label != "none":
+                misses += 1
+
+    return {
+        "threshold": threshold,
+        "cooldown": cooldown,
+        "chords": chords,
+        "misfires": misfires,
+        "repeats": repeats,
+        "misses": misses,
+        "avg_latency_ms": latency_total / fired * 1000 if fired else 0.0,
+    }
+
+
+def score(result, latency_weight):
+    """Lower is better: error rate plus weighted mean gesture latency in seconds."""
+    if not result["chords"]:
+        return float("inf")
+    errors = (result["misfires"] + result["repeats"] + result["misses"]) / result["chords"]
+    return errors + latency_weight * result["avg_latency_ms"] / 1000
+
+
+def _init_worker(paths, chord):
+    global _sessions
+    _sessions = load_sessions(paths, chord)
+
+
+def _evaluate_candidate(candidate):
+    return evaluate(_sessions, *candidate)
+
+
+def distance(result, current):
+    """How far a result's setting is from ``current``, as fractions of the search ranges."""
+    return sum(abs(result[key] - value) / (high - low)
+               for key, value, (low, high) in zip(("threshold", "cooldown"), current,
+                                                   (THRESHOLD_RANGE, COOLDOWN_RANGE)))
+
+
+def grid(center=None, span=None, steps=11, cooldown=None):
+    """Candidate (threshold, cooldown) pairs, optionally zoomed around ``center``.
+
+    A given ``cooldown`` is kept fixed instead of searched.
+    """
+    if steps < 2:
+        raise ValueError("A grid needs at least 2 steps per parameter")
+    if cooldown is not None:
+        return [(t, cooldown) for t, _ in grid(center, span, steps)[::steps]]
+    ranges = []
+    for i, (low, high) in enumerate((THRESHOLD_RANGE, COOLDOWN_RANGE)):
+        if center is not None:
+            low = max(low, center[i] - span[i])
+            high = min(high, center[i] + span[i])
+        step = (high - low) / (steps - 1)
+        ranges.append([round(low + step * j, 3) for j in range(steps)])
+    return [(t, c) for t in ranges[0] for c in ranges[1]]
+
+
+def tune(paths, steps=11, refine=1, latency_weight=0.5, workers=None, chord=("left", "right"),
+         current=(120.0, 0.5)):
+    """Coarse grid search followed by ``refine`` zoomed grids around the best point.
+
+    ``current`` is the configured (threshold, cooldown). The cooldown is only
+    searched if the corpus has repeat chords; ``"cooldown_tuned"`` in the
+    result says whether it was.
+    """
+    cooldown_tuned = repeat_chords(load_sessions(paths, chord)) > 0
+    fixed_cooldown = None if cooldown_tuned else current[1]
+    span = [(high - low) / 2 for low, high in (THRESHOLD_RANGE, COOLDOWN_RANGE)]
+    candidates = grid(steps=steps, cooldown=fixed_cooldown)
+    best = None
+    best_key = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(paths, tuple(chord))) as pool:
+        for _ in range(refine + 1):
+            chunksize = max(1, len(candidates) // ((workers or os.cpu_count() or 1) * 4))
+            for result in pool.map(_evaluate_candidate, candidates, chunksize=chunksize):
+                # Equal scores: stay close to what is configured rather than take the first grid point
+                key = (score(result, latency_weight), distance(result, current))
+                if best is None or key < best_key:
+                    best, best_key = result, key
+            span = [s * 2 / (steps - 1) for s in span]
+            candidates = grid((best["threshold"], best["cooldown"]), span, steps, fixed_cooldown)
+    best["cooldown_tuned"] = cooldown_tuned
+    return best
+
+
+def write_config(path, result):
+    """Store the tuned threshold (and cooldown, if tuned), keeping every other setting."""
+    with open(path, "r") as f:
+        config = json.load(f)
+    config["threshold"] = result["threshold"]
+    if result.get("cooldown_tuned", True):
+        config["cooldown"] = result["cooldown"]
+    # Like the app's own save: a crash mid-write must not truncate the live config
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(config, f, indent=4)
+    os.replace(temp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune threshold and cooldown from recorded traces.")
+    parser.add_argument("corpus", help="trace file or directory of .trace files")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "config.json"),
+        help="config.json to take chord_buttons and the current threshold and cooldown from")
+    parser.add_argument("--steps", type=int, default=11, help="grid points per parameter")
+    parser.add_argument("--refine", type=int, default=1, help="zoomed grid passes after the coarse grid")
+    parser.add_argument("--latency-weight", type=float, default=0.5,
+                        help="error-rate penalty per second of mean gesture latency")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--write-config", metavar="CONFIG", help="write the result into this config.json")
+    args = parser.parse_args(argv)
+    if args.steps < 2:
+        parser.error("--steps must be at least 2")
+
+    paths = trace_files(args.corpus)
+    if not paths:
+        print(f"No traces found in {args.corpus}")
+        return 1
+
+    # Segment the traces with the chord the app is configured for
+    config = {}
+    if os.path.exists(args.config):
+        with open(args.config, "r") as f:
+            config = json.load(f)
+    chord = config.get("chord_buttons", ["left", "right"])
+    current = (config.get("threshold", 120.0), config.get("cooldown", 0.5))
+
+    best = tune(paths, args.steps, args.refine, args.latency_weight, args.workers, chord, current)
+    if not best["chords"]:
+        print("No labeled chords found in the corpus.")
+        return 1
+
+    print(f"Best threshold: {best['threshold']:.1f} px")
+    if best["cooldown_tuned"]:
+        print(f"Best cooldown:  {best['cooldown']:.2f} s")
+    else:
+        print(f"Cooldown:       {best['cooldown']:.2f} s (kept; no 'none' chords right after a gesture"
+              f" to tune it on)")
+    print(f"Misfires: {best['misfires']}/{best['chords']}  Repeats: {best['repeats']}/{best['chords']}"
+          f"  Misses: {best['misses']}/{best['chords']}  Avg latency: {best['avg_latency_ms']:.1f} ms")
+
+    if args.write_config:
+        write_config(args.write_config, best)
+        print(f"Saved to {args.write_config}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
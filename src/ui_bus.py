@@ -0,0 +1,92 @@
+"""
+UIBus
+-----
+Thread-safe, coalescing hand-off of UI updates to the Tk main loop.
+
+Tk widgets may only be touched from the thread running the main loop, but
+the tray icon, the control channel, the input hook and the worker threads all
+produce state the window shows. They post updates here instead: posting only
+appends to a queue, and a timer on the main loop drains it. Updates to the
+same widget within one frame are merged, so only the latest value of each
+option is applied and a burst of events costs one redraw per widget.
+"""
+
+import queue
+import time
+
+FRAME_MS = 16   # Drain interval while updates are arriving
+IDLE_MS = 100   # Slower drain interval once the queue has been empty for a while
+IDLE_AFTER = 1.0
+
+
+class UIBus:
+    def __init__(self, root, frame_ms=FRAME_MS, idle_ms=IDLE_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.idle_ms = idle_ms
+        # Counted on the main thread only, so posting stays a single queue put
+        self.received = 0
+        self.applied = 0
+        self._queue = queue.SimpleQueue()
+        self._last_update = 0.0
+        self._timer = None
+
+    def start(self):
+        """Start draining (call from the main thread)."""
+        if self._timer is None:
+            self._timer = self.root.after(self.frame_ms, self._drain)
+
+    def stop(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def configure(self, widget, **options):
+        """Set widget options; later values for the same option win within a frame."""
+        self._queue.put((widget, None, options))
+
+    def post(self, key, func, *args):
+        """Call ``func(*args)`` on the main thread; only the last call per ``key`` in a frame runs."""
+        self._queue.put((key, func, args))
+
+    def call(self, func, *args):
+        """Call ``func(*args)`` on the main thread, never coalesced."""
+        self.post(object(), func, *args)
+
+    def stats(self):
+        return {"posted": self.received + self._queue.qsize(), "applied": self.applied,
+                "coalesced": self.received - self.applied}
+
+    def drain(self):
+        """Apply everything posted so far; returns the number of Tk updates made."""
+        updates = {}
+        while True:
+            try:
+                key, func, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.received += 1
+            if func is None and key in updates:
+                updates[key][1].update(payload)
+            elif func is None:
+                updates[key] = (None, dict(payload))
+            else:
+                updates[key] = (func, payload)
+
+        for key, (func, payload) in updates.items():
+            try:
+                if func is None:
+                    key.config(**payload)
+                else:
+                    func(*payload)
+            except Exception as e:
+                print(f"Error applying UI update: {e}")
+        self.applied += len(updates)
+        return len(updates)
+
+    def _drain(self):
+        now = time.perf_counter()
+        if self.drain():
+            self._last_update = now
+        busy = now - self._last_update < IDLE_AFTER
+        self._timer = self.root.after(self.frame_ms if busy else self.idle_ms, self._drain)
@@ -26,6 +26,14 @@ def main():
     if "--startup" in sys.argv or "startup" in str(sys.argv).lower():
         start_minimized = True
     
+    # Single instance: leave the running app alone (or bring it up when launched by hand)
+    from control import is_running, send_command
+    if is_running():
+        if not start_minimized:
+            send_command("show")
+        print("Mouse Gesture Control is already running.")
+        sys.exit(0)
+    
     # Check if we're running from a startup context
     # (This is a simple heuristic - in practice, the installer will set this up)
     try: